@@ -9,9 +9,12 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from . import db
 from .config import server_config
-from .routers import (auth_router, categories_router, posts_router,
+from .routers import (auth_router, backup_router, categories_router,
+                      comment_router, feeds_router, metrics_router,
+                      pages_router, posts_router, resource_router,
                       setting_router, tags_router)
-from .utils import Response
+from .utils import Response, bus, feeds, pages, search, storage, tasks
+from .utils.timing import TimingMiddleware
 
 
 @asynccontextmanager
@@ -19,20 +22,35 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up...")
     logger.info(f"Running at {server_config.host}:{server_config.port}")
     await db.init_db()
+    await search.load_or_build()
+    await pages.rebuild()
+    await feeds.warm()
+    tasks.every(server_config.cache_poll_interval, bus.poll)
+    tasks.every(3600, bus.prune)
+    tasks.every(3600, storage.gc_upload_sessions)
+    tasks.every(server_config.count_reconcile_interval, db.reconcile_counts)
     logger.info("Started successfully")
 
-    app.include_router(setting_router)
-    app.include_router(auth_router)
-    app.include_router(posts_router)
-    app.include_router(tags_router)
-    app.include_router(categories_router)
-
     yield
+    await tasks.stop_all()
+    await search.save()
     await db.Tortoise.close_connections()
 
 
 app = FastAPI(lifespan=lifespan, title="MoBlog", default_response_class=ORJSONResponse)
 
+app.include_router(setting_router)
+app.include_router(auth_router)
+app.include_router(posts_router)
+app.include_router(tags_router)
+app.include_router(categories_router)
+app.include_router(backup_router)
+app.include_router(resource_router)
+app.include_router(comment_router)
+app.include_router(pages_router)
+app.include_router(feeds_router)
+app.include_router(metrics_router)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=server_config.cros_origin.split(","),
@@ -40,6 +58,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TimingMiddleware)
 
 
 @app.exception_handler(StarletteHTTPException)
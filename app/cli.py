@@ -0,0 +1,165 @@
+"""
+MoBlog 管理命令
+
+    python -m app.cli migrate
+    python -m app.cli render [--batch-size 500] [--prune]
+    python -m app.cli export backup.ndjson.gz
+    python -m app.cli import backup.ndjson.gz
+    python -m app.cli reconcile
+    python -m app.cli read-model [--check]
+    python -m app.cli snapshot static/ [--incremental] [--gzip]
+"""
+
+import argparse
+import asyncio
+from typing import AsyncIterator
+
+from loguru import logger
+from tortoise import Tortoise
+
+from . import db
+from .schema import Post, RenderedContent
+from .utils.backup import BackupFormatError, export_ndjson, gzip_stream, import_ndjson
+from .utils.markdown import render_missing
+from .utils.snapshot import build_snapshot
+
+
+async def render_posts(batch_size: int, prune: bool):
+    """
+    批量渲染所有文章的 Markdown，已渲染过的内容会被跳过
+    """
+    rendered = 0
+    hashes: set[str] = set()
+    last_id = 0
+    while True:
+        rows = await (
+            Post.filter(id__gt=last_id)
+            .order_by("id")
+            .limit(batch_size)
+            .values_list("id", "content")
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        count, keys = await render_missing(content for _, content in rows)
+        rendered += count
+        hashes.update(keys)
+
+    logger.info(f"Rendered {rendered} of {len(hashes)} distinct post contents")
+
+    if prune:
+        stale = [
+            key
+            for key in await RenderedContent.all().values_list("id", flat=True)
+            if key not in hashes
+        ]
+        for i in range(0, len(stale), batch_size):
+            await RenderedContent.filter(id__in=stale[i : i + batch_size]).delete()
+        logger.info(f"Pruned {len(stale)} stale renders")
+
+
+async def export_file(path: str):
+    body = export_ndjson()
+    if path.endswith(".gz"):
+        body = gzip_stream(body)
+    with open(path, "wb") as f:
+        async for chunk in body:
+            f.write(chunk)
+    logger.info(f"Exported to {path}")
+
+
+async def read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def run(args: argparse.Namespace):
+    try:
+        if args.command == "migrate":
+            # 结构不一致时 init_db 会拒绝启动，迁移只连接数据库
+            await db.connect()
+            await db.migrate()
+            logger.info("Database is up to date")
+            return
+        await db.init_db()
+        if args.command == "render":
+            await render_posts(args.batch_size, args.prune)
+        elif args.command == "export":
+            await export_file(args.path)
+        elif args.command == "import":
+            try:
+                logger.info(f"Imported {await import_ndjson(read_file(args.path))}")
+            except BackupFormatError as e:
+                logger.error(f"Import stopped: {e}")
+                raise SystemExit(1)
+        elif args.command == "reconcile":
+            await db.reconcile_counts()
+        elif args.command == "read-model":
+            stale = await db.check_read_model(fix=not args.check)
+            if args.check:
+                logger.info(f"{stale} posts have a stale read model")
+                if stale:
+                    raise SystemExit(1)
+            else:
+                logger.info(f"Rebuilt the read model of {stale} posts")
+        elif args.command == "snapshot":
+            await build_snapshot(
+                args.path, args.incremental, args.gzip, args.list_pages
+            )
+    finally:
+        await Tortoise.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("migrate", help="Add columns missing from an existing database")
+
+    render_parser = sub.add_parser("render", help="Re-render Markdown of all posts")
+    render_parser.add_argument("--batch-size", type=int, default=500)
+    render_parser.add_argument(
+        "--prune", action="store_true", help="Remove renders no post refers to"
+    )
+
+    export_parser = sub.add_parser("export", help="Export the blog as NDJSON")
+    export_parser.add_argument("path", help="Output file, gzip if ending with .gz")
+
+    import_parser = sub.add_parser("import", help="Import an NDJSON export")
+    import_parser.add_argument("path", help="Input file, plain or gzip")
+
+    sub.add_parser(
+        "reconcile",
+        help="Recount posts of every tag and category and comments of every post",
+    )
+
+    read_model_parser = sub.add_parser(
+        "read-model", help="Rebuild the denormalized post read model"
+    )
+    read_model_parser.add_argument(
+        "--check", action="store_true", help="Only report stale posts, exit 1 if any"
+    )
+
+    snapshot_parser = sub.add_parser(
+        "snapshot", help="Pre-render read-only API responses as static JSON"
+    )
+    snapshot_parser.add_argument("path", help="Output directory")
+    snapshot_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-render posts changed since the last run",
+    )
+    snapshot_parser.add_argument(
+        "--gzip", action="store_true", help="Also write .gz files for gzip_static"
+    )
+    snapshot_parser.add_argument(
+        "--list-pages", type=int, default=10, help="Post list pages to pre-render"
+    )
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
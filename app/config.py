@@ -1,7 +1,4 @@
 import secrets
-from random import choices
-from readline import redisplay
-from typing import Literal
 
 import dotenv
 from pydantic import Field
@@ -14,11 +11,83 @@ class Config(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     db_url: str = Field("", description="Database URL")
+    db_replica_urls: str = Field("", description="Comma separated read replica URLs")
+    fast_boot: bool = Field(
+        True, description="Skip schema generation when the models are unchanged"
+    )
+    db_pool_min: int = Field(1, description="Min connections per pool", ge=0)
+    db_pool_max: int = Field(10, description="Max connections per pool", ge=1)
     secret_key: str = Field(description="Secret key", default=secrets.token_hex(32))
     cros_origin: str = Field("*", description="Cross origin")
 
     host: str = "0.0.0.0"
     port: int = Field(8000, description="Port", le=65535, ge=1)  # 1- 65535
 
+    auth_cache_size: int = Field(1024, description="Auth user cache size", ge=0)
+    auth_cache_ttl: int = Field(300, description="Auth user cache TTL (seconds)")
+
+    search_index_path: str = Field(
+        "search_index.json", description="Search index snapshot file"
+    )
+
+    resource_dir: str = Field("resources", description="Resource storage directory")
+    resource_max_size: int = Field(
+        100 * 1024 * 1024, description="Max resource upload size (bytes)"
+    )
+
+    upload_max_size: int = Field(
+        16 * 1024**3, description="Max resumable upload size (bytes)"
+    )
+    upload_max_sessions: int = Field(
+        4, description="Max open upload sessions per user", ge=1
+    )
+    upload_user_quota: int = Field(
+        16 * 1024**3, description="Max bytes preallocated by one user's sessions"
+    )
+    upload_session_ttl: int = Field(
+        24 * 3600, description="Idle upload sessions expire after (seconds)"
+    )
+
+    server_timing: bool = Field(True, description="Emit Server-Timing headers")
+    slow_query_ms: float = Field(200, description="Log queries slower than (ms)")
+    metrics_token: str = Field(
+        "", description="Bearer token for /metrics, which is disabled when empty"
+    )
+
+    workers: int = Field(1, description="Worker processes of the launcher", ge=1)
+    cache_poll_interval: float = Field(
+        1.0, description="Seconds between polls for cache invalidation events"
+    )
+    cache_event_ttl: int = Field(
+        3600, description="Cache invalidation events are kept for (seconds)"
+    )
+    cache_event_gap_timeout: float = Field(
+        60, description="Seconds to keep re-checking event ids committed out of order"
+    )
+
+    count_reconcile_interval: float = Field(
+        3600, description="Seconds between post and comment count reconciles"
+    )
+
+    post_read_model: bool = Field(
+        True, description="List posts from denormalized columns instead of joins"
+    )
+
+    site_url: str = Field(
+        "http://localhost:8000", description="Public site URL used in feeds"
+    )
+    post_url_template: str = Field(
+        "{site_url}/posts/{id}", description="Public URL of a post in feeds"
+    )
+    feed_size: int = Field(20, description="Posts in the Atom feed", ge=1)
+    sitemap_shard_size: int = Field(
+        10000, description="Posts per sitemap file", ge=1, le=50000
+    )
+
+    hash_workers: int = Field(2, description="Password hashing threads", ge=1)
+    hash_queue_size: int = Field(
+        16, description="Max pending password hashing jobs", ge=1
+    )
+
 
 server_config = Config()  # type: ignore
@@ -1,11 +1,44 @@
-from tortoise import Tortoise
+import random
+from contextvars import ContextVar
+from typing import Union
+
+import xxhash
+from fastapi import Request
+from loguru import logger
+from tortoise import Tortoise, connections
+from tortoise.backends.base.client import TransactionalDBClient
+from tortoise.backends.base.config_generator import expand_db_url
+from tortoise.exceptions import OperationalError
+from tortoise.models import Model
+from tortoise.utils import get_schema_sql
 
 from .config import server_config
 from .schema import *
+from .utils import bus
+from .utils.timing import install_db_hooks
+
+REPLICA_URLS = [
+    url.strip() for url in server_config.db_replica_urls.split(",") if url.strip()
+]
+REPLICAS = [f"replica{i}" for i in range(len(REPLICA_URLS))]
+
+
+def connection_config(url: str) -> Union[str, dict]:
+    """
+    带连接池的数据库加上池大小配置，URL 中已指定的参数优先；SQLite 没有连接池
+    """
+    if not url or url.startswith("sqlite"):
+        return url
+    config = expand_db_url(url)
+    config["credentials"].setdefault("minsize", server_config.db_pool_min)
+    config["credentials"].setdefault("maxsize", server_config.db_pool_max)
+    return config
+
 
 ORM_CONFIG = {
     "connections": {
-        "default": server_config.db_url,
+        "default": connection_config(server_config.db_url),
+        **{name: connection_config(url) for name, url in zip(REPLICAS, REPLICA_URLS)},
     },
     "apps": {
         "models": {
@@ -13,12 +46,217 @@ ORM_CONFIG = {
             "default_connection": "default",
         },
     },
+    "routers": ["app.db.ReplicaRouter"],
     "use_tz": True,
 }
 
+# 当前请求的读查询是否可以发往只读副本
+use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
 
-async def init_db():
-    await Tortoise.init(ORM_CONFIG)
 
+async def read_replica(request: Request):
+    """
+    路由依赖：只读请求（GET/HEAD）中的查询使用只读副本
+    """
+    use_replica.set(bool(REPLICAS) and request.method in ("GET", "HEAD"))
+    yield
+    use_replica.set(False)
+
+
+class ReplicaRouter:
+    """
+    读查询在允许时发往随机的只读副本；写入、事务中的查询以及同一请求中写入之后的读取
+    都使用主库，保证能读到自己的写入
+    """
+
+    def db_for_read(self, model) -> Optional[str]:
+        if not use_replica.get():
+            return None
+        if isinstance(connections.get("default"), TransactionalDBClient):
+            return None
+        return random.choice(REPLICAS)
+
+    def db_for_write(self, model) -> Optional[str]:
+        use_replica.set(False)
+        return None
+
+
+# 记录模型结构哈希的配置键，属于 Config.INTERNAL_KEYS
+SCHEMA_KEY = "schema_hash"
+
+
+def schema_hash() -> str:
+    return xxhash.xxh3_128_hexdigest(
+        get_schema_sql(connections.get("default"), safe=False).encode()
+    )
+
+
+# 为已有表新增的列：(模型, 列, 列定义, 各数据库的不同定义)。generate_schemas
+# 只会创建缺失的表，旧数据库需执行 python -m app.cli migrate 补齐
+ADDED_COLUMNS: list[tuple[type[Model], str, str, dict[str, str]]] = [
+    (Tag, "post_count", "INT NOT NULL DEFAULT 0", {}),
+    (Category, "post_count", "INT NOT NULL DEFAULT 0", {}),
+    (Post, "comment_count", "INT NOT NULL DEFAULT 0", {}),
+    (Post, "author_name", "VARCHAR(255) NOT NULL DEFAULT ''", {}),
+    (Post, "category_name", "VARCHAR(255) NOT NULL DEFAULT ''", {}),
+    (
+        Post,
+        "tag_list",
+        "JSON NOT NULL DEFAULT '[]'",
+        # MySQL 的 JSON 列只能使用表达式默认值（8.0.13+）
+        {
+            "postgres": "JSONB NOT NULL DEFAULT '[]'",
+            "mysql": "JSON NOT NULL DEFAULT ('[]')",
+        },
+    ),
+    (
+        Comment,
+        "parent_id",
+        "INT NULL REFERENCES comments (id) ON DELETE CASCADE",
+        # MySQL 会忽略列定义中的 REFERENCES，需要单独添加外键
+        {
+            "mysql": "INT NULL, ADD FOREIGN KEY (parent_id) "
+            "REFERENCES comments (id) ON DELETE CASCADE"
+        },
+    ),
+    (
+        Resource,
+        "content_type",
+        "VARCHAR(255) NOT NULL DEFAULT 'application/octet-stream'",
+        {},
+    ),
+    (Resource, "size", "BIGINT NOT NULL DEFAULT 0", {}),
+]
+
+
+async def table_columns(table: str) -> set[str]:
+    """
+    数据库中某张表现有的列（表名来自模型定义）
+    """
+    conn = connections.get("default")
+    dialect = conn.capabilities.dialect
+    if dialect == "sqlite":
+        rows = await conn.execute_query_dict(f"PRAGMA table_info({table})")
+    else:
+        schema = "DATABASE()" if dialect == "mysql" else "current_schema()"
+        rows = await conn.execute_query_dict(
+            "SELECT column_name AS name FROM information_schema.columns "
+            f"WHERE table_name = '{table}' AND table_schema = {schema}"
+        )
+    return {row["name"] for row in rows}
+
+
+async def missing_columns() -> list[str]:
+    """
+    检查模型的列在数据库中是否都存在，返回缺失的 "表.列"
+    """
+    missing = []
+    for model in Tortoise.apps["models"].values():
+        table = model._meta.db_table
+        existing = await table_columns(table)
+        missing += [
+            f"{table}.{column}"
+            for column in model._meta.fields_db_projection.values()
+            if column not in existing
+        ]
+    return missing
+
+
+async def ensure_schema():
+    """
+    模型结构与数据库中记录的哈希一致时跳过建表，否则建表并更新哈希；
+    已有表缺少列时拒绝启动，需先执行迁移
+    """
+    digest = schema_hash()
+    try:
+        # 同时加载配置缓存，结构未变时启动只需这一次查询
+        stored = (await Config.load_cache()).get(SCHEMA_KEY)
+    except OperationalError:
+        # 配置表尚不存在
+        stored = None
+    if server_config.fast_boot and stored == digest:
+        return
     await Tortoise.generate_schemas(safe=True)
+    # 不能记录哈希，否则下次启动会跳过检查
+    if missing := await missing_columns():
+        raise RuntimeError(
+            f"Database is missing columns {', '.join(missing)}; "
+            "run `python -m app.cli migrate` first"
+        )
+    await Config.set_val(SCHEMA_KEY, digest)
+
+
+async def migrate():
+    """
+    补齐已有表缺少的列，回填读模型和计数后记录模型结构哈希
+    """
+    await Tortoise.generate_schemas(safe=True)
+    conn = connections.get("default")
+    missing = set(await missing_columns())
+    for model, column, definition, overrides in ADDED_COLUMNS:
+        table = model._meta.db_table
+        if f"{table}.{column}" not in missing:
+            continue
+        definition = overrides.get(conn.capabilities.dialect, definition)
+        await conn.execute_script(
+            f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+        )
+        logger.info(f"Added column {table}.{column}")
+    if missing := await missing_columns():
+        raise RuntimeError(f"Cannot migrate columns {', '.join(missing)}")
+    # 新增的列只有默认值，按关联表重新计算
+    await check_read_model(fix=True)
+    await reconcile_counts()
+    await Config.set_val(SCHEMA_KEY, schema_hash())
+
+
+async def reconcile_counts():
+    """
+    修正标签和分类上维护的文章数以及文章的评论数（定期执行，弥补并发或异常导致的偏差）
+    """
+    fixed = await Tag.reconcile_post_counts() + await Category.reconcile_post_counts()
+    if fixed:
+        logger.warning(f"Reconciled post counts of {fixed} tags/categories")
+    if fixed := await Post.reconcile_comment_counts():
+        logger.warning(f"Reconciled comment counts of {fixed} posts")
+
+
+async def check_read_model(fix: bool = False, batch_size: int = 1000) -> int:
+    """
+    逐批比对文章读模型列、评论数与关联表，返回不一致的文章数；fix 时同时修正（即重建）
+    """
+    stale = 0
+    last_id = 0
+    while True:
+        ids = (
+            await Post.filter(id__gt=last_id)
+            .order_by("id")
+            .limit(batch_size)
+            .values_list("id", flat=True)
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        stale += await Post.sync_read_model(ids, fix=fix)
+        stale += await Post.reconcile_comment_counts(ids, fix=fix)
+    return stale
+
+
+async def connect():
+    await Tortoise.init(ORM_CONFIG)
+    install_db_hooks()
+
+
+async def init_db():
+    await connect()
+
+    # 在加载配置等缓存之前确定事件起点，加载期间其它 worker 发布的事件不会丢失
+    await bus.start()
+    try:
+        await ensure_schema()
+    except Exception:
+        # 关闭连接后再退出，否则 SQLite 的后台线程会让进程无法退出
+        await Tortoise.close_connections()
+        raise
     await Config.init()
+    await Config.get_all()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -29,3 +30,23 @@ class PostUpdateModel(BaseModel):
     content: Optional[str] = Field(..., description="Content")
     category_id: Optional[int] = Field(..., description="Category ID")
     tag_names: Optional[list[str]] = Field(..., description="Tag IDs")
+
+
+class PostImportModel(BaseModel):
+    title: str = Field(..., description="Title")
+    summary: str = Field(..., description="Summary")
+    content: str = Field(..., description="Content")
+    category: str = Field(..., description="Category name")
+    tag_names: list[str] = Field([], description="Tag names")
+    created_at: Optional[datetime] = Field(None, description="Created at")
+
+
+class CommentCreateModel(BaseModel):
+    post_id: int = Field(..., description="Post ID")
+    content: str = Field(..., description="Content")
+    parent_id: Optional[int] = Field(None, description="Parent comment ID")
+
+
+class PageModel(BaseModel):
+    slug: str = Field(..., description="Slug")
+    content: str = Field(..., description="Content")
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -19,15 +19,35 @@ class PostInfo(BaseModel):
     category: str = Field(..., description="Category")
     tags: list[str] = Field(..., description="Tags")
     author: str = Field(..., description="Author")
+    comment_count: int = Field(0, description="Comment count")
     created_at: str = Field(..., description="Created at")
     updated_at: str = Field(..., description="Updated at")
 
 
+class PostSummary(BaseModel):
+    id: int = Field(..., description="ID")
+    title: str = Field(..., description="Title")
+    summary: str = Field(..., description="Summary")
+    category: str = Field(..., description="Category")
+    tags: list[str] = Field(..., description="Tags")
+    author: str = Field(..., description="Author")
+    comment_count: int = Field(0, description="Comment count")
+    created_at: str = Field(..., description="Created at")
+    updated_at: str = Field(..., description="Updated at")
+
+
+PostView = Literal["full", "summary"]
+
+PostFormat = Literal["markdown", "html"]
+
+
 class GetPostResult(BaseModel):
-    total: int = Field(..., description="Count")
-    posts: list[PostInfo] = Field(..., description="Posts")
+    total: Optional[int] = Field(..., description="Count")
+    posts: list[Union[PostInfo, PostSummary]] = Field(..., description="Posts")
     page: int = Field(..., description="Page")
     per_page: int = Field(..., description="Per page")
+    next_cursor: Optional[str] = Field(None, description="Cursor of next page")
+    prev_cursor: Optional[str] = Field(None, description="Cursor of previous page")
 
 
 class TagInfo(BaseModel):
@@ -35,6 +55,58 @@ class TagInfo(BaseModel):
     name: str
 
 
+class TagCountInfo(TagInfo):
+    post_count: int
+
+
 class CategoryInfo(BaseModel):
     id: int
     name: str
+
+
+class CategoryCountInfo(CategoryInfo):
+    post_count: int
+
+
+class BulkImportResult(BaseModel):
+    ids: list[int] = Field(..., description="Created post IDs")
+    tags_created: int = Field(..., description="Created tags")
+    categories_created: int = Field(..., description="Created categories")
+    elapsed: float = Field(..., description="Elapsed seconds")
+    posts_per_second: float = Field(..., description="Throughput")
+
+
+class ResourceInfo(BaseModel):
+    id: str = Field(..., description="xxh3_128 of content")
+    desc: str = Field(..., description="Description")
+    content_type: str = Field(..., description="MIME type")
+    size: int = Field(..., description="Size in bytes")
+    created_at: str = Field(..., description="Created at")
+
+
+class UploadSessionInfo(BaseModel):
+    id: str = Field(..., description="Upload session ID")
+    size: int = Field(..., description="Total size in bytes")
+    received: int = Field(..., description="Bytes received so far")
+
+
+class CommentInfo(BaseModel):
+    id: int = Field(..., description="ID")
+    post_id: int = Field(..., description="Post ID")
+    parent_id: Optional[int] = Field(..., description="Parent comment ID")
+    content: str = Field(..., description="Content")
+    author: str = Field(..., description="Author")
+    created_at: str = Field(..., description="Created at")
+
+
+class GetCommentResult(BaseModel):
+    comments: list[CommentInfo] = Field(..., description="Comments")
+    per_page: int = Field(..., description="Per page")
+    next_cursor: Optional[str] = Field(None, description="Cursor of next page")
+
+
+class PageInfo(BaseModel):
+    slug: str = Field(..., description="Slug")
+    content: str = Field(..., description="Content")
+    created_at: str = Field(..., description="Created at")
+    updated_at: str = Field(..., description="Updated at")
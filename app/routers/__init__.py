@@ -1,5 +1,11 @@
 from .auth import router as auth_router
+from .backup import router as backup_router
 from .categories import router as categories_router
+from .comment import router as comment_router
+from .feeds import router as feeds_router
+from .metrics import router as metrics_router
+from .pages import router as pages_router
 from .posts import router as posts_router
+from .resource import router as resource_router
 from .setting import router as setting_router
 from .tags import router as tags_router
@@ -1,14 +1,16 @@
+from datetime import datetime, timezone
 from typing import Optional
 
-import bcrypt
 from fastapi import APIRouter, Depends, HTTPException
+from tortoise.transactions import in_transaction
 
 import app.utils.auth as auth
+from app.db import read_replica
 from app.models import UserInfo, UserRegisterModel, UserUpdateModel
-from app.schema import User
-from app.utils import Response
+from app.schema import Comment, Post, User
+from app.utils import Response, bus
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(read_replica)])
 
 UserID = str
 
@@ -28,8 +30,8 @@ async def login(username: str, password: str) -> Response[str]:
     if u is None:
         return Response.error("User not found", 404)
 
-    # 使用 bcrypt 验证密码
-    if not bcrypt.checkpw(password.encode(), u.password.encode()):
+    # 使用 bcrypt 验证密码（在线程池中执行）
+    if not await auth.check_password(password, u.password):
         return Response.error("Password is incorrect", 401)
 
     return Response.success(auth.make_token(u))
@@ -52,13 +54,10 @@ async def register(data: UserRegisterModel) -> Response[str]:
     if auth.check_pwd_policy(data.password) is False:
         return Response.error("Password is too weak", 400)
 
-    # 生成 16 字节的盐
-    salt = bcrypt.gensalt(rounds=12)  # 使用 bcrypt 生成盐
+    # 使用 bcrypt 对密码进行哈希（在线程池中执行）
+    hashed_password = await auth.hash_password(data.password)
 
-    # 使用 bcrypt 对密码进行哈希
-    hashed_password = bcrypt.hashpw(data.password.encode(), salt)
-
-    u = User(username=data.username, password=hashed_password.decode())
+    u = User(username=data.username, password=hashed_password)
 
     if not User.exists():
         u.update_from_dict(
@@ -95,7 +94,16 @@ async def remove_user(
     if target is None:
         return Response.error("User not found", 404)
 
-    await target.delete()
+    async with in_transaction("default") as conn:
+        post_ids = await Post.release_counts(Post.filter(author_id=target.id), conn)
+        # 用户在其他文章下的评论（及其回复）同样被级联删除
+        await Comment.release_counts(
+            Comment.filter(author_id=target.id).exclude(post__author_id=target.id),
+            conn,
+        )
+        await target.delete(using_db=conn)
+    await bus.publish("users", target.username)
+    await bus.publish_many("posts", map(str, post_ids))
     return Response.success()
 
 
@@ -123,12 +131,21 @@ async def update_user(
     data_dict = data.model_dump(exclude_unset=True)
     # 处理密码更新
     if data.password:
-        # 生成 16 字节的盐
-        salt = bcrypt.gensalt(rounds=12)  # 使用 bcrypt 生成盐
-        # 使用 bcrypt 对密码进行哈希
-        hashed_password = bcrypt.hashpw(data.password.encode(), salt).decode()
-        data_dict["password"] = hashed_password
+        # 使用 bcrypt 对密码进行哈希（在线程池中执行）
+        data_dict["password"] = await auth.hash_password(data.password)
 
     # 更新目标用户信息
-    await target.update_from_dict(data_dict).save()
+    old_username = target.username
+    post_ids = []
+    async with in_transaction("default") as conn:
+        await target.update_from_dict(data_dict).save(using_db=conn)
+        if target.username != old_username:
+            # 同时更新 updated_at，使文章的 ETag 和快照签名随作者名变化
+            query = Post.filter(author_id=target.id).using_db(conn)
+            post_ids = await query.values_list("id", flat=True)
+            await query.update(
+                author_name=target.username, updated_at=datetime.now(timezone.utc)
+            )
+    await bus.publish("users", old_username)
+    await bus.publish_many("posts", map(str, post_ids))
     return Response.success(target.to_safe_dict())
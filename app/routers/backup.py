@@ -0,0 +1,49 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from app.schema import User
+from app.utils import Response
+from app.utils.auth import get_current_user, get_stream_user
+from app.utils.backup import (BackupFormatError, export_ndjson, gzip_stream,
+                              import_ndjson)
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export(compress: bool = False, user: User = Depends(get_current_user)):
+    """
+    以 NDJSON 流式导出全站数据，可选 gzip 压缩
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    filename = f"moblog-{date.today().isoformat()}.ndjson"
+    body = export_ndjson()
+    media_type = "application/x-ndjson"
+    if compress:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import")
+async def restore(
+    request: Request, user: User = Depends(get_stream_user)
+) -> Response[dict[str, int]]:
+    """
+    流式导入 /export 导出的数据（支持 gzip）
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    try:
+        counts = await import_ndjson(request.stream())
+    except BackupFormatError as e:
+        return Response.error(str(e), 400)
+    return Response.success(counts)
@@ -1,17 +1,33 @@
-from fastapi import APIRouter, Depends
+from typing import Optional, Union
 
-from app.models import CategoryInfo, GetPostResult
-from app.schema import Category
-from app.utils import Response
+from fastapi import APIRouter, Depends, Query, Request
+from tortoise.transactions import in_transaction
+
+from app.db import read_replica
+from app.models import CategoryCountInfo, CategoryInfo, GetPostResult, PostView
+from app.schema import Category, Post
+from app.utils import Response, bus
 from app.utils.auth import get_current_user
+from app.utils.conditional import conditional
+from app.utils.pagination import paginate_posts
 
-router = APIRouter(prefix="/categories")
+router = APIRouter(prefix="/categories", dependencies=[Depends(read_replica)])
 
 
 @router.get("/")
-async def get_categories() -> Response[list[CategoryInfo]]:
+async def get_categories(
+    request: Request, with_counts: bool = False
+) -> Response[list[Union[CategoryCountInfo, CategoryInfo]]]:
+    """
+    获取所有分类，with_counts 时附带文章数
+    """
     categories = await Category.all()
-    return Response.success([category.to_safe_dict() for category in categories])
+    return conditional(
+        request,
+        Response.success(
+            [category.to_safe_dict(with_counts) for category in categories]
+        ),
+    )
 
 
 @router.post("/")
@@ -33,13 +49,22 @@ async def delete_category(category_id: int, user=Depends(get_current_user)) -> R
     category = await Category.get_or_none(id=category_id)
     if not category:
         return Response.error(message="Category not found")
-    await category.delete()
+    async with in_transaction("default") as conn:
+        post_ids = await Post.release_counts(Post.filter(category_id=category.id), conn)
+        await category.delete(using_db=conn)
+    await bus.publish_many("posts", map(str, post_ids))
     return Response.success(message="Category deleted")
 
 
 @router.get("/{category_id}")
 async def get_post_by_category(
-    category_id: int, page: int = 1, per_page: int = 10
+    category_id: int,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    cursor: bool = False,
+    view: PostView = "full",
 ) -> Response[GetPostResult]:
     """
     获取指定标签下的所有文章（支持分页）
@@ -48,21 +73,16 @@ async def get_post_by_category(
     if not category:
         return Response.error(message="Category not found")
 
-    # 预加载 posts 关系，避免 N+1 查询
-    await category.fetch_related("posts")
-
-    # 获取分页数据
-    offset = (page - 1) * per_page
-    posts = await category.posts.offset(offset).limit(per_page)  # type: ignore
-    # 计算总文章数
-    total = len(category.posts)  # type: ignore
-
-    # 返回 Result
+    # 获取分页数据（批量加载关系，总数使用分类上维护的文章数）
     return Response.success(
-        GetPostResult(
-            page=page,
-            per_page=per_page,
-            posts=[await post.to_safe_dict() for post in posts],
-            total=total,
+        await paginate_posts(
+            Post.filter(category_id=category_id),
+            page,
+            per_page,
+            after,
+            before,
+            cursor,
+            view,
+            total=category.post_count,
         )
     )
@@ -0,0 +1,95 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from tortoise.expressions import F, Q
+from tortoise.transactions import in_transaction
+
+from app.models import CommentCreateModel, CommentInfo, GetCommentResult
+from app.schema import Comment, Post, User
+from app.utils import Response
+from app.utils.auth import get_current_user
+from app.utils.pagination import decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/comments")
+
+
+@router.get("/")
+async def get_comments(
+    post_id: int,
+    parent_id: Optional[int] = None,
+    after: Optional[str] = None,
+    per_page: int = Query(20, ge=1, le=100),
+) -> Response[GetCommentResult]:
+    """
+    获取文章的评论（游标分页，按时间正序）
+
+    不传 parent_id 时返回顶层评论，否则返回该评论的回复。
+    """
+    query = Comment.filter(post_id=post_id, parent_id=parent_id)
+    if after:
+        created_at, id = decode_cursor(after)
+        query = query.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=id)
+        )
+    # 一次查询加载整页评论及其作者
+    comments = [
+        comment.to_safe_dict()
+        for comment in await query.order_by("created_at", "id")
+        .limit(per_page + 1)
+        .select_related("author")
+    ]
+    next_cursor = None
+    if len(comments) > per_page:
+        comments = comments[:per_page]
+        next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return Response.success(
+        GetCommentResult(comments=comments, per_page=per_page, next_cursor=next_cursor)
+    )
+
+
+@router.post("/")
+async def create_comment(
+    data: CommentCreateModel, user: User = Depends(get_current_user)
+) -> Response[CommentInfo]:
+    """
+    发表评论或回复
+    """
+    if not await Post.exists(id=data.post_id):
+        return Response.error("Post not found", 404)
+    if data.parent_id is not None and not await Comment.exists(
+        id=data.parent_id, post_id=data.post_id
+    ):
+        return Response.error("Parent comment not found", 404)
+
+    async with in_transaction("default") as conn:
+        comment = await Comment.create(
+            post_id=data.post_id,
+            parent_id=data.parent_id,
+            content=data.content,
+            author=user,
+            using_db=conn,
+        )
+        await Post.filter(id=data.post_id).using_db(conn).update(
+            comment_count=F("comment_count") + 1
+        )
+    return Response.success(comment.to_safe_dict())
+
+
+@router.delete("/{comment_id}")
+async def delete_comment(
+    comment_id: int, user: User = Depends(get_current_user)
+) -> Response:
+    """
+    删除评论及其所有回复
+    """
+    comment = await Comment.get_or_none(id=comment_id)
+    if comment is None:
+        return Response.error("Comment not found", 404)
+    if comment.author_id != user.id and not user.is_admin:  # type: ignore
+        return Response.error("No permission", 403)
+
+    async with in_transaction("default") as conn:
+        # 回复随评论级联删除，一并扣除
+        await Comment.release_counts(Comment.filter(id=comment.id), conn)
+        await comment.delete(using_db=conn)
+    return Response.success()
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response as HTTPResponse
+
+from app.utils import feeds
+from app.utils.conditional import (is_not_modified, not_modified,
+                                   validator_headers)
+
+# 不使用只读副本：失效后立即重新生成，副本的延迟会让旧内容被长期缓存
+router = APIRouter()
+
+
+def serve(request: Request, document: feeds.Document, media_type: str):
+    if is_not_modified(request, document.etag, document.last_modified):
+        return not_modified(document.etag, document.last_modified)
+    return HTTPResponse(
+        document.body,
+        media_type=media_type,
+        headers=validator_headers(document.etag, document.last_modified),
+    )
+
+
+@router.get("/feed.xml", include_in_schema=False)
+async def get_feed(request: Request):
+    """
+    最新文章的 Atom 订阅
+    """
+    return serve(request, await feeds.get_feed(), "application/atom+xml")
+
+
+@router.get("/sitemap.xml", include_in_schema=False)
+async def get_sitemap_index(request: Request):
+    """
+    sitemap 索引
+    """
+    return serve(request, await feeds.get_index(), "application/xml")
+
+
+@router.get("/sitemap-{shard:int}.xml", include_in_schema=False)
+async def get_sitemap(request: Request, shard: int):
+    """
+    sitemap 分片，每个分片包含一段连续 ID 的文章
+    """
+    if (document := await feeds.get_shard(shard)) is None:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return serve(request, document, "application/xml")
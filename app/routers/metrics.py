@@ -0,0 +1,91 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from tortoise import connections
+
+from app.config import server_config
+from app.schema import Config
+from app.utils import auth, feeds, markdown, metrics, pages
+
+router = APIRouter()
+
+db_pool_size = metrics.Gauge(
+    "moblog_db_pool_connections", "Open connections in the pool", ("connection",)
+)
+db_pool_in_use = metrics.Gauge(
+    "moblog_db_pool_connections_in_use", "Connections checked out", ("connection",)
+)
+db_pool_max = metrics.Gauge(
+    "moblog_db_pool_connections_max", "Pool size limit", ("connection",)
+)
+cache_hits = metrics.Counter("moblog_cache_hits_total", "Cache hits", ("cache",))
+cache_misses = metrics.Counter("moblog_cache_misses_total", "Cache misses", ("cache",))
+cache_hit_ratio = metrics.Gauge(
+    "moblog_cache_hit_ratio", "Cache hits / lookups", ("cache",)
+)
+cache_size = metrics.Gauge("moblog_cache_entries", "Cached entries", ("cache",))
+hash_pending = metrics.Gauge(
+    "moblog_password_hash_pending", "Password hashing jobs queued or running"
+)
+hash_capacity = metrics.Gauge(
+    "moblog_password_hash_queue_size", "Max pending password hashing jobs"
+)
+
+# 需要暴露命中率的缓存
+caches = {
+    "auth_user": auth.user_cache,
+    "config": Config.cache_stats,
+    "rendered_content": markdown.stats,
+    "feeds": feeds.stats,
+    "pages": pages.stats,
+}
+
+
+def collect():
+    """
+    抓取时才读取的指标：连接池、缓存与密码哈希队列
+    """
+    for name in connections.db_config:
+        pool = getattr(connections.get(name), "_pool", None)
+        # SQLite 没有连接池
+        if pool is None:
+            continue
+        db_pool_size.set(name, value=pool.size)
+        db_pool_in_use.set(name, value=pool.size - pool.freesize)
+        db_pool_max.set(name, value=pool.maxsize)
+
+    for name, cache in caches.items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        cache_hits.set(name, value=stats["hits"])
+        cache_misses.set(name, value=stats["misses"])
+        cache_hit_ratio.set(name, value=stats["hits"] / lookups if lookups else 0.0)
+        if stats["size"] is not None:
+            cache_size.set(name, value=stats["size"])
+
+    hash_pending.set(value=auth.hash_pending)
+    hash_capacity.set(value=server_config.hash_queue_size)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus 文本格式的指标；未配置 metrics_token 时不提供，
+    抓取时需携带 Authorization: Bearer <metrics_token>
+    """
+    if not server_config.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(
+        authorization or "", f"Bearer {server_config.metrics_token}"
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    collect()
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response as HTTPResponse
+from tortoise.exceptions import IntegrityError
+
+from app.models import PageInfo, PageModel
+from app.schema import Page
+from app.utils import Response, bus, pages
+from app.utils.auth import get_current_user
+from app.utils.conditional import is_not_modified, not_modified
+
+router = APIRouter(prefix="/pages")
+
+
+@router.get("/")
+async def get_pages() -> Response[list[str]]:
+    """
+    获取所有页面的 slug
+    """
+    return Response.success(sorted(pages.snapshot))
+
+
+@router.get("/{slug}")
+async def get_page(request: Request, slug: str) -> Response[PageInfo]:
+    """
+    获取页面（直接返回内存快照中预先序列化的内容）
+    """
+    entry = pages.get(slug)
+    if entry is None:
+        return Response.error("Page not found", 404)
+    if is_not_modified(request, entry.etag):
+        return not_modified(entry.etag)
+    return HTTPResponse(
+        entry.body, media_type="application/json", headers={"ETag": entry.etag}
+    )
+
+
+@router.post("/")
+async def create_page(
+    data: PageModel, user=Depends(get_current_user)
+) -> Response[PageInfo]:
+    """
+    创建页面
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    try:
+        page = await Page.create(slug=data.slug, content=data.content)
+    except IntegrityError:
+        return Response.error("Page already exists", 409)
+    await bus.publish("pages")
+    return Response.success(page.to_safe_dict())
+
+
+@router.put("/{slug}")
+async def update_page(
+    slug: str, data: PageModel, user=Depends(get_current_user)
+) -> Response[PageInfo]:
+    """
+    更新页面（可同时修改 slug）
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    page = await Page.get_or_none(slug=slug)
+    if page is None:
+        return Response.error("Page not found", 404)
+    page.slug = data.slug
+    page.content = data.content
+    try:
+        await page.save()
+    except IntegrityError:
+        return Response.error("Page already exists", 409)
+    await bus.publish("pages")
+    return Response.success(page.to_safe_dict())
+
+
+@router.delete("/{slug}")
+async def delete_page(slug: str, user=Depends(get_current_user)) -> Response:
+    """
+    删除页面
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    if not await Page.filter(slug=slug).delete():
+        return Response.error("Page not found", 404)
+    await bus.publish("pages")
+    return Response.success(message="Page deleted")
@@ -1,41 +1,93 @@
-from turtle import pos
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from collections import Counter
+from typing import Optional
 
-from app.models import GetPostResult, PostCreateModel, PostInfo, PostUpdateModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from tortoise.transactions import in_transaction
+
+from app.config import server_config
+from app.db import read_replica
+from app.models import (BulkImportResult, GetPostResult, PostCreateModel,
+                        PostFormat, PostImportModel, PostInfo, PostUpdateModel,
+                        PostView)
 from app.schema import Category, Post, Tag, User
-from app.utils import Response
+from app.utils import Response, bus, feeds
 from app.utils.auth import get_current_user
+from app.utils.conditional import (conditional, is_not_modified, make_etag,
+                                   not_modified, validator_headers)
+from app.utils.markdown import ensure_rendered, render_missing
+from app.utils.pagination import paginate_posts
+from app.utils.search import search_index
 
-router = APIRouter(prefix="/posts")
+router = APIRouter(prefix="/posts", dependencies=[Depends(read_replica)])
 
 
 @router.get("/")
-async def get_posts(page: int = 1, per_page: int = 10) -> Response[GetPostResult]:
+async def get_posts(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    cursor: bool = False,
+    view: PostView = "full",
+) -> Response[GetPostResult]:
     """
-    获取文章列表（支持分页）
+    获取文章列表（支持分页，传入 cursor/after/before 时使用游标分页）
     """
-    offset = (page - 1) * per_page
-    posts = await Post.all().offset(offset).limit(per_page)
-    post_count = await Post.all().count()
-    out = []
-    for post in posts:
-        await post.fetch_related("tags", "category", "author")
-        out.append(post.to_safe_dict())
+    return conditional(
+        request,
+        Response.success(
+            await paginate_posts(
+                Post.all(), page, per_page, after, before, cursor, view
+            )
+        ),
+    )
+
+
+@router.get("/search")
+async def search_posts(
+    q: str,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
+    view: PostView = "summary",
+) -> Response[GetPostResult]:
+    """
+    全文搜索文章（标题、摘要、正文、标签），按相关度排序
+    """
+    ids, total = search_index.search(q, per_page, (page - 1) * per_page)
+    load = Post.load_list if view == "full" else Post.load_summaries
+    rank = {post_id: i for i, post_id in enumerate(ids)}
+    posts = sorted(await load(Post.filter(id__in=ids)), key=lambda p: rank[p.id])
     return Response.success(
-        GetPostResult(posts=out, total=post_count, page=page, per_page=per_page)
+        GetPostResult(posts=posts, total=total, page=page, per_page=per_page)
     )
 
 
 @router.get("/{post_id}")
-async def get_post_by_id(post_id: int) -> Response[PostInfo]:
+async def get_post_by_id(
+    request: Request, post_id: int, format: PostFormat = "markdown"
+) -> Response[PostInfo]:
     """
-    根据文章 ID 获取文章详情
+    根据文章 ID 获取文章详情（支持 ETag / Last-Modified 条件请求）
+
+    format 为 html 时 content 返回预渲染的 HTML
     """
     post = await Post.get_or_none(id=post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    await post.fetch_related("tags", "category", "author")
-    return Response(data=await post.to_safe_dict())
+    # 未修改时无需加载关系和序列化
+    etag = make_etag(post.id, post.updated_at.isoformat(), post.comment_count, format)
+    if is_not_modified(request, etag, post.updated_at):
+        return not_modified(etag, post.updated_at)
+    if server_config.post_read_model:
+        info = post.read_model_dict()
+    else:
+        await post.fetch_related("tags", "category", "author")
+        info = post.to_safe_dict()
+    if format == "html":
+        info.content = await ensure_rendered(post.content)
+    return Response.success(info, headers=validator_headers(etag, post.updated_at))
 
 
 @router.post("")
@@ -50,24 +102,112 @@ async def create_post(
     if category is None:
         return Response.error("Category not found", 404)
 
-    post = await Post.create(
-        title=data.title,
-        summary=data.summary,
-        content=data.content,
-        author=user,
-        category=category,
-    )
+    # 一次查询解析全部标签，缺失时不创建文章
+    tag_names = set(data.tag_names)
+    tags = await Tag.filter(name__in=tag_names)
+    if missing := tag_names - {tag.name for tag in tags}:
+        return Response(
+            data={"tags": sorted(missing)}, message="Tag not found", status_code=404
+        ).ret()
 
-    for tag_name in data.tag_names:
-        tag = await Tag.get_or_none(name=tag_name)
-        if tag is None:
-            return Response(
-                data={"tag": tag}, message="Tag not found", status_code=404
-            ).ret()
-        await post.tags.add(tag)
+    async with in_transaction("default") as conn:
+        post = await Post.create(
+            title=data.title,
+            summary=data.summary,
+            content=data.content,
+            author=user,
+            category=category,
+            author_name=user.username,
+            category_name=category.name,
+            tag_list=[tag.name for tag in sorted(tags, key=lambda tag: tag.id)],
+            using_db=conn,
+        )
+        await Post.bulk_add_tags([(post.id, tag.id) for tag in tags], conn)
+        await Category.add_post_counts({category.id: 1}, conn)
+        await Tag.add_post_counts({tag.id: 1 for tag in tags}, conn)
+    await ensure_rendered(post.content)
+    await bus.publish("posts", str(post.id))
     return Response(data={"id": post.id}, message="Post created")
 
 
+@router.post("/bulk")
+async def import_posts(
+    data: list[PostImportModel], user: User = Depends(get_current_user)
+) -> Response[BulkImportResult]:
+    """
+    批量导入文章，自动创建缺失的标签和分类
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    start = time.perf_counter()
+
+    async with in_transaction("default") as conn:
+        tag_names = {name for item in data for name in item.tag_names}
+        tags_created = await Tag.bulk_import_names(tag_names, conn)
+        category_names = {item.category for item in data}
+        categories_created = await Category.bulk_import_names(category_names, conn)
+
+        tags = dict(
+            await Tag.filter(name__in=tag_names)
+            .using_db(conn)
+            .values_list("name", "id")
+        )
+        categories = dict(
+            await Category.filter(name__in=category_names)
+            .using_db(conn)
+            .values_list("name", "id")
+        )
+
+        # MySQL 批量插入无法取回自增 ID，文章逐条插入，但在同一个事务中提交
+        posts = []
+        for item in data:
+            posts.append(
+                await Post.create(
+                    title=item.title,
+                    summary=item.summary,
+                    content=item.content,
+                    author=user,
+                    category_id=categories[item.category],
+                    author_name=user.username,
+                    category_name=item.category,
+                    tag_list=sorted(set(item.tag_names), key=tags.__getitem__),
+                    using_db=conn,
+                    # 未指定时使用当前时间
+                    **({"created_at": item.created_at} if item.created_at else {}),
+                )
+            )
+        pairs = [
+            (post.id, tags[name])
+            for post, item in zip(posts, data)
+            for name in dict.fromkeys(item.tag_names)
+        ]
+        await Post.bulk_add_tags(pairs, conn)
+        await Category.add_post_counts(
+            Counter(categories[item.category] for item in data), conn
+        )
+        await Tag.add_post_counts(Counter(tag_id for _, tag_id in pairs), conn)
+
+    await render_missing(item.content for item in data)
+    for post, item in zip(posts, data):
+        search_index.add(
+            post.id, item.title, item.summary, item.content, item.tag_names
+        )
+    feeds.invalidate()
+    # 本进程已直接写入索引，其它 worker 整体重建
+    await bus.publish("posts", local=False)
+
+    elapsed = time.perf_counter() - start
+    return Response.success(
+        BulkImportResult(
+            ids=[post.id for post in posts],
+            tags_created=tags_created,
+            categories_created=categories_created,
+            elapsed=elapsed,
+            posts_per_second=len(posts) / elapsed if elapsed else 0,
+        )
+    )
+
+
 @router.put("/{post_id}")
 async def update_post(
     post_id: int, data: PostUpdateModel, user: User = Depends(get_current_user)
@@ -78,8 +218,31 @@ async def update_post(
     post = await Post.get_or_none(id=post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    post.update_from_dict(data.model_dump(exclude_unset=True))
-    await post.save()
+    data_dict = data.model_dump(exclude_unset=True)
+    old_category_id = post.category_id  # type: ignore
+    post.update_from_dict(data_dict)
+    if post.category_id != old_category_id:  # type: ignore
+        category = await Category.get_or_none(id=post.category_id)  # type: ignore
+        if category is None:
+            return Response.error("Category not found", 404)
+        post.category_name = category.name
+        data_dict["category_name"] = category.name
+    async with in_transaction("default") as conn:
+        # 只写入修改过的列，避免覆盖并发更新的评论数
+        await post.save(
+            update_fields=[
+                key for key in data_dict if key in Post._meta.fields_db_projection
+            ]
+            + ["updated_at"],
+            using_db=conn,
+        )
+        if post.category_id != old_category_id:  # type: ignore
+            await Category.add_post_counts(
+                {old_category_id: -1, post.category_id: 1}, conn  # type: ignore
+            )
+    if "content" in data_dict:
+        await ensure_rendered(post.content)
+    await bus.publish("posts", str(post.id))
     return Response(message="Post updated")
 
 
@@ -91,5 +254,10 @@ async def delete_post(post_id: int, user: User = Depends(get_current_user)) -> R
     post = await Post.get_or_none(id=post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    await post.delete()
+    tag_ids = await post.tags.all().values_list("id", flat=True)
+    async with in_transaction("default") as conn:
+        await post.delete(using_db=conn)
+        await Category.add_post_counts({post.category_id: -1}, conn)  # type: ignore
+        await Tag.add_post_counts({id: -1 for id in tag_ids}, conn)
+    await bus.publish("posts", str(post_id))
     return Response(message="文章删除成功")
@@ -1,3 +1,199 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi.responses import FileResponse
+from tortoise.functions import Count, Sum
+
+from app.config import server_config
+from app.models import ResourceInfo, UploadSessionInfo
+from app.schema import Resource, UploadSession, User
+from app.utils import Response
+from app.utils.auth import get_current_user, get_stream_user
+from app.utils.storage import (absolute_path, commit_file, hash_file,
+                               is_inline, preallocate, receive_to_temp,
+                               remove_file, session_path, write_at)
 
 router = APIRouter(prefix="/resources")
+
+ResourceID = Path(pattern=r"^[0-9a-f]{32}$")
+
+
+@router.post("/")
+async def upload_resource(
+    request: Request, desc: str = "", user: User = Depends(get_stream_user)
+) -> Response[ResourceInfo]:
+    """
+    上传资源（请求体即文件内容），相同内容只保存一份
+    """
+    key, tmp, size = await receive_to_temp(request.stream())
+    path = await asyncio.to_thread(commit_file, tmp, key)
+    resource, _ = await Resource.get_or_create(
+        id=key,
+        defaults={
+            "path": path,
+            "desc": desc,
+            "size": size,
+            "content_type": request.headers.get(
+                "content-type", "application/octet-stream"
+            ),
+        },
+    )
+    return Response.success(resource.to_safe_dict())
+
+
+async def get_session(session_id: str, user: User) -> UploadSession:
+    session = await UploadSession.get_or_none(id=session_id, owner_id=user.id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+@router.post("/uploads")
+async def create_upload(
+    size: int,
+    desc: str = "",
+    content_type: str = "application/octet-stream",
+    user: User = Depends(get_current_user),
+) -> Response[UploadSessionInfo]:
+    """
+    创建可续传的上传会话，预先分配文件空间
+    """
+    if not 0 <= size <= server_config.upload_max_size:
+        return Response.error("File is too large", 413)
+    # 每个会话都会预先占用磁盘空间，限制单个用户的会话数和总大小
+    row = (
+        await UploadSession.filter(owner_id=user.id)
+        .annotate(count=Count("id"), total=Sum("size"))
+        .first()
+        .values("count", "total")
+    )
+    count, total = (row["count"], row["total"] or 0) if row else (0, 0)
+    if count >= server_config.upload_max_sessions:
+        return Response.error("Too many open uploads", 429)
+    if total + size > server_config.upload_user_quota:
+        return Response.error("Upload quota exceeded", 413)
+    session_id = uuid.uuid4().hex
+    await asyncio.to_thread(preallocate, session_path(session_id), size)
+    session = await UploadSession.create(
+        id=session_id, owner=user, size=size, desc=desc, content_type=content_type
+    )
+    return Response.success(session.to_safe_dict())
+
+
+@router.get("/uploads/{session_id}")
+async def get_upload(
+    session_id: str, user: User = Depends(get_current_user)
+) -> Response[UploadSessionInfo]:
+    """
+    查询上传进度，客户端从 received 处继续上传
+    """
+    return Response.success((await get_session(session_id, user)).to_safe_dict())
+
+
+@router.put("/uploads/{session_id}")
+async def upload_chunk(
+    request: Request,
+    session_id: str,
+    offset: int,
+    user: User = Depends(get_stream_user),
+) -> Response[UploadSessionInfo]:
+    """
+    从 offset 处写入一段数据（请求体），offset 不能超过已接收的字节数
+    """
+    session = await get_session(session_id, user)
+    if not 0 <= offset <= session.received:
+        return Response.error(f"Offset must be within 0..{session.received}", 409)
+    end = await write_at(
+        session_path(session_id), offset, session.size, request.stream()
+    )
+    # 只前移进度，避免并发的重传请求回退进度
+    # 查询集更新不会触发 auto_now，需显式刷新活动时间，否则会话按创建时间过期
+    now = datetime.now(timezone.utc)
+    if not await UploadSession.filter(id=session_id, received__lt=end).update(
+        received=end, updated_at=now
+    ):
+        await UploadSession.filter(id=session_id).update(updated_at=now)
+    await session.refresh_from_db()
+    return Response.success(session.to_safe_dict())
+
+
+@router.post("/uploads/{session_id}/finalize")
+async def finalize_upload(
+    session_id: str, hash: str, user: User = Depends(get_current_user)
+) -> Response[ResourceInfo]:
+    """
+    校验 xxh3_128 哈希并生成资源
+    """
+    session = await get_session(session_id, user)
+    if session.received < session.size:
+        return Response.error("Upload is incomplete", 409)
+    path = session_path(session_id)
+    key = await asyncio.to_thread(hash_file, path)
+    if key != hash.lower():
+        return Response.error("Hash mismatch", 422)
+
+    resource, _ = await Resource.get_or_create(
+        id=key,
+        defaults={
+            "path": await asyncio.to_thread(commit_file, path, key),
+            "desc": session.desc,
+            "size": session.size,
+            "content_type": session.content_type,
+        },
+    )
+    await session.delete()
+    return Response.success(resource.to_safe_dict())
+
+
+@router.delete("/uploads/{session_id}")
+async def abort_upload(
+    session_id: str, user: User = Depends(get_current_user)
+) -> Response:
+    """
+    取消上传会话
+    """
+    session = await get_session(session_id, user)
+    await session.delete()
+    await asyncio.to_thread(remove_file, session_path(session_id))
+    return Response.success()
+
+
+@router.get("/{resource_id}")
+async def get_resource(resource_id: str = ResourceID):
+    """
+    下载资源，支持 Range 请求；内容按哈希寻址，永不改变
+
+    类型由上传者指定，除图片、音视频外一律作为附件下载，避免在本站域名下执行
+    """
+    resource = await Resource.get_or_none(id=resource_id)
+    if resource is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{resource.id}"',
+        "X-Content-Type-Options": "nosniff",
+    }
+    if not is_inline(resource.content_type):
+        headers["Content-Disposition"] = f'attachment; filename="{resource.id}"'
+    return FileResponse(
+        absolute_path(resource.path), media_type=resource.content_type, headers=headers
+    )
+
+
+@router.delete("/{resource_id}")
+async def delete_resource(
+    resource_id: str = ResourceID, user: User = Depends(get_current_user)
+) -> Response:
+    """
+    删除资源
+    """
+    if not user.is_admin:
+        return Response.error("No permission", 403)
+    resource = await Resource.get_or_none(id=resource_id)
+    if resource is None:
+        return Response.error("Resource not found", 404)
+    await resource.delete()
+    await asyncio.to_thread(remove_file, absolute_path(resource.path))
+    return Response.success()
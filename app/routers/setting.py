@@ -2,17 +2,17 @@ from typing import Mapping
 
 from fastapi import APIRouter, Depends
 
+from app.db import read_replica
 from app.schema import Config
-from app.utils import Response
+from app.utils import Response, bus
 from app.utils.auth import get_current_user
 
-router = APIRouter(prefix="/setting")
+router = APIRouter(prefix="/setting", dependencies=[Depends(read_replica)])
 
 
 @router.get("/get_all")
 async def get_all() -> Response[Mapping[str, str]]:
-    raw = await Config.all()
-    return Response.success({item.key: item.value for item in raw})
+    return Response.success(await Config.get_all())
 
 
 @router.post("/set")
@@ -20,7 +20,10 @@ async def set_val(key: str, value: str, user=Depends(get_current_user)):
     """
     设置配置项
     """
+    if key in Config.INTERNAL_KEYS:
+        return Response.error("Key is not allowed", 400)
     await Config.set_val(key, value)
+    await bus.publish("config")
     return Response.success()
 
 
@@ -33,6 +36,7 @@ async def init(user=Depends(get_current_user)):
         return Response.error("No permission", 403)
     await Config.set_val("init", "n")
     await Config.init()
+    await bus.publish("config")
     return Response.success()
 
 
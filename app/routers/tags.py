@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends
+from typing import Optional, Union
 
-from app.models import GetPostResult, TagInfo
-from app.schema import Tag
-from app.utils import Response
+from fastapi import APIRouter, Depends, Query, Request
+from tortoise.transactions import in_transaction
+
+from app.db import read_replica
+from app.models import GetPostResult, PostView, TagCountInfo, TagInfo
+from app.schema import Post, Tag
+from app.utils import Response, bus
 from app.utils.auth import get_current_user
+from app.utils.conditional import conditional
+from app.utils.pagination import paginate_posts
 
-router = APIRouter(prefix="/tags")
+router = APIRouter(prefix="/tags", dependencies=[Depends(read_replica)])
 
 
 @router.get("/")
-async def get_tags() -> Response[list[TagInfo]]:
+async def get_tags(
+    request: Request, with_counts: bool = False
+) -> Response[list[Union[TagCountInfo, TagInfo]]]:
+    """
+    获取所有标签，with_counts 时附带文章数（用于标签云）
+    """
     tags = await Tag.all()
-    return Response.success(data=[tag.to_safe_dict() for tag in tags])
+    return conditional(
+        request,
+        Response.success(data=[tag.to_safe_dict(with_counts) for tag in tags]),
+    )
 
 
 @router.post("/")
@@ -31,13 +45,23 @@ async def delete_tag(tag_id: int, user=Depends(get_current_user)) -> Response:
     tag = await Tag.get_or_none(id=tag_id)
     if not tag:
         return Response.error(message="Tag not found")
-    await tag.delete()
+    post_ids = await Post.filter(tags__id=tag_id).values_list("id", flat=True)
+    async with in_transaction("default") as conn:
+        await tag.delete(using_db=conn)
+        await Post.sync_read_model(post_ids, conn)
+    await bus.publish_many("posts", map(str, post_ids))
     return Response.success(message="Tag deleted")
 
 
 @router.get("/{tag_id}")
 async def get_post_by_tag(
-    tag_id: int, page: int = 1, per_page: int = 10
+    tag_id: int,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=100),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    cursor: bool = False,
+    view: PostView = "full",
 ) -> Response[GetPostResult]:
     """
     获取指定标签下的所有文章（支持分页）
@@ -46,22 +70,16 @@ async def get_post_by_tag(
     if not tag:
         return Response.error(message="Tag not found")
 
-    # 预加载 posts 关系，避免 N+1 查询
-    await tag.fetch_related("posts")
-
-    # 获取分页数据
-    offset = (page - 1) * per_page
-    await tag.fetch_related("posts")
-    posts = await tag.posts.offset(offset).limit(per_page)  # type: ignore
-    # 计算总文章数
-    total = len(await tag.posts)  # type: ignore
-
-    # 返回 Result
+    # 获取分页数据（批量加载关系，总数使用标签上维护的文章数）
     return Response.success(
-        GetPostResult(
-            page=page,
-            per_page=per_page,
-            posts=[await post.to_safe_dict() for post in posts],
-            total=total,
+        await paginate_posts(
+            Post.filter(tags__id=tag_id),
+            page,
+            per_page,
+            after,
+            before,
+            cursor,
+            view,
+            total=tag.post_count,
         )
     )
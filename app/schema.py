@@ -1,12 +1,18 @@
-from operator import index
-from typing import Optional
+from datetime import datetime, timezone
+from typing import ClassVar, Iterable, Mapping, Optional
 
-from tortoise import fields
+from pypika_tortoise import Table
+from tortoise import BaseDBAsyncClient, connections, fields
+from tortoise.expressions import F
+from tortoise.functions import Count
 from tortoise.indexes import Index
 from tortoise.models import Model
+from tortoise.queryset import QuerySet
 
 import app.models as models
+from app.config import server_config
 from app.models.response import CategoryInfo, TagInfo
+from app.utils.cache import CacheStats
 
 
 class User(Model):
@@ -37,19 +43,98 @@ class User(Model):
         indexes = [Index(fields=["username", "id"])]
 
 
+async def _add_counts(
+    model: type[Model],
+    field: str,
+    deltas: Mapping[int, int],
+    using_db: Optional[BaseDBAsyncClient] = None,
+):
+    """
+    增量修改计数列（ID -> 变化量），变化量相同的行合并为一条 UPDATE
+    """
+    groups: dict[int, list[int]] = {}
+    for id, delta in deltas.items():
+        if delta:
+            groups.setdefault(delta, []).append(id)
+    for delta, ids in groups.items():
+        await model.filter(id__in=ids).using_db(using_db).update(
+            **{field: F(field) + delta}
+        )
+
+
+async def _reconcile_counts(
+    model: type[Model],
+    field: str,
+    relation: str,
+    ids: Optional[Iterable[int]] = None,
+    fix: bool = True,
+) -> int:
+    """
+    按关联记录的实际数量修正计数列，返回不一致的行数；fix 为 False 时只检查
+    """
+    query = model.all() if ids is None else model.filter(id__in=list(ids))
+    stale = 0
+    for id, actual, stored in await query.annotate(actual=Count(relation)).values_list(
+        "id", "actual", field
+    ):
+        if actual == stored:
+            continue
+        if not fix:
+            stale += 1
+            continue
+        # 计数在此期间被并发修改时跳过，留给下一次修正
+        stale += await model.filter(id=id, **{field: stored}).update(**{field: actual})
+    return stale
+
+
 class Tag(Model):
     id = fields.IntField(pk=True)
     name = fields.CharField(max_length=255, unique=True, index=True)  # 标签名
+    post_count = fields.IntField(default=0)  # 文章数，写入文章时增量维护
 
     def __str__(self):
         return self.name
 
-    def to_safe_dict(self):
+    def to_safe_dict(self, with_count: bool = False):
+        if with_count:
+            return models.TagCountInfo(
+                id=self.id, name=self.name, post_count=self.post_count
+            )
         return TagInfo(
             id=self.id,
             name=self.name,
         )
 
+    @classmethod
+    async def add_post_counts(
+        cls, deltas: Mapping[int, int], using_db: Optional[BaseDBAsyncClient] = None
+    ):
+        await _add_counts(cls, "post_count", deltas, using_db)
+
+    @classmethod
+    async def reconcile_post_counts(cls, ids: Optional[Iterable[int]] = None) -> int:
+        return await _reconcile_counts(cls, "post_count", "posts", ids)
+
+    @classmethod
+    async def bulk_import_names(
+        cls, names: set[str], using_db: Optional[BaseDBAsyncClient] = None
+    ) -> int:
+        """
+        批量创建不存在的标签，返回新建数量
+        """
+        existing = (
+            await cls.filter(name__in=names)
+            .using_db(using_db)
+            .values_list("name", flat=True)
+        )
+        if missing := names - set(existing):
+            await cls.bulk_create(
+                [cls(name=name) for name in missing],
+                ignore_conflicts=True,
+                using_db=using_db,
+            )
+        return len(missing)
+
     class Meta:  # type: ignore
         table = "tags"
 
@@ -57,16 +142,51 @@ class Tag(Model):
 class Category(Model):
     id = fields.IntField(pk=True)
     name = fields.CharField(max_length=255, unique=True, index=True)  # 类别名
+    post_count = fields.IntField(default=0)  # 文章数，写入文章时增量维护
 
     def __str__(self):
         return self.name
 
-    def to_safe_dict(self):
+    def to_safe_dict(self, with_count: bool = False):
+        if with_count:
+            return models.CategoryCountInfo(
+                id=self.id, name=self.name, post_count=self.post_count
+            )
         return CategoryInfo(
             id=self.id,
             name=self.name,
         )
 
+    @classmethod
+    async def add_post_counts(
+        cls, deltas: Mapping[int, int], using_db: Optional[BaseDBAsyncClient] = None
+    ):
+        await _add_counts(cls, "post_count", deltas, using_db)
+
+    @classmethod
+    async def reconcile_post_counts(cls, ids: Optional[Iterable[int]] = None) -> int:
+        return await _reconcile_counts(cls, "post_count", "posts", ids)
+
+    @classmethod
+    async def bulk_import_names(
+        cls, names: set[str], using_db: Optional[BaseDBAsyncClient] = None
+    ) -> int:
+        """
+        批量创建不存在的分类，返回新建数量
+        """
+        existing = (
+            await cls.filter(name__in=names)
+            .using_db(using_db)
+            .values_list("name", flat=True)
+        )
+        if missing := names - set(existing):
+            await cls.bulk_create(
+                [cls(name=name) for name in missing],
+                ignore_conflicts=True,
+                using_db=using_db,
+            )
+        return len(missing)
+
     class Meta:  # type: ignore
         table = "categories"
 
@@ -82,26 +202,230 @@ class Post(Model):
     tags = fields.ManyToManyField("models.Tag", related_name="posts")  # 标签
     category = fields.ForeignKeyField("models.Category", related_name="posts")
     comments = fields.ReverseRelation["Comment"]
+    comment_count = fields.IntField(default=0)  # 评论数（写入评论时维护）
+    # 反范式的读模型：随文章存储作者名、分类名和标签名（按标签 ID 排序），
+    # 列表只需查询 posts 一张表；写入时同步，见 sync_read_model
+    author_name = fields.CharField(max_length=255, default="")
+    category_name = fields.CharField(max_length=255, default="")
+    tag_list = fields.JSONField(default=list)
 
     def __str__(self):
         return f"Post({self.title},{self.id})"
 
-    async def to_safe_dict(self):
-        await self.fetch_related("tags")
+    def to_safe_dict(self):
+        """
+        需要预先加载 tags、category、author 关系
+        """
         return models.PostInfo(
             id=self.id,
             title=self.title,
             summary=self.summary,
             tags=[tag.name for tag in self.tags],
             content=self.content,
-            author=(await self.author.first()).username,
-            category=(await self.category.first()).name,
+            author=self.author.username,
+            category=self.category.name,
+            comment_count=self.comment_count,
+            created_at=self.created_at.isoformat(),
+            updated_at=self.updated_at.isoformat(),
+        )
+
+    def read_model_dict(self):
+        """
+        由读模型列生成，无需加载关系
+        """
+        return models.PostInfo(
+            id=self.id,
+            title=self.title,
+            summary=self.summary,
+            tags=self.tag_list,
+            content=self.content,
+            author=self.author_name,
+            category=self.category_name,
+            comment_count=self.comment_count,
             created_at=self.created_at.isoformat(),
             updated_at=self.updated_at.isoformat(),
         )
 
+    @classmethod
+    async def load_list(cls, query: QuerySet["Post"]) -> list[models.PostInfo]:
+        """
+        批量加载一页文章：一次查询文章（JOIN 作者与分类），一次查询所有标签，
+        查询次数与页大小无关；启用读模型时只需一次单表查询
+        """
+        if server_config.post_read_model:
+            return [post.read_model_dict() for post in await query]
+        posts = await query.select_related("author", "category").prefetch_related(
+            "tags"
+        )
+        return [post.to_safe_dict() for post in posts]
+
+    @classmethod
+    async def load_summaries(cls, query: QuerySet["Post"]) -> list[models.PostSummary]:
+        """
+        批量加载一页文章摘要：只查询列表需要的列，不读取正文
+        """
+        columns = (
+            "id",
+            "title",
+            "summary",
+            "comment_count",
+            "created_at",
+            "updated_at",
+        )
+        if server_config.post_read_model:
+            rows = await query.values(
+                *columns,
+                author="author_name",
+                category="category_name",
+                tags="tag_list",
+            )
+        else:
+            rows = await query.values(
+                *columns,
+                author="author__username",
+                category="category__name",
+            )
+            tags: dict[int, list[str]] = {row["id"]: [] for row in rows}
+            if tags:
+                for tag in await Tag.filter(posts__id__in=list(tags)).values(
+                    "name", post_id="posts__id"
+                ):
+                    tags[tag["post_id"]].append(tag["name"])
+            for row in rows:
+                row["tags"] = tags[row["id"]]
+        return [
+            models.PostSummary(
+                id=row["id"],
+                title=row["title"],
+                summary=row["summary"],
+                tags=row["tags"],
+                author=row["author"],
+                category=row["category"],
+                comment_count=row["comment_count"],
+                created_at=row["created_at"].isoformat(),
+                updated_at=row["updated_at"].isoformat(),
+            )
+            for row in rows
+        ]
+
+    @classmethod
+    async def sync_read_model(
+        cls,
+        ids: Iterable[int],
+        using_db: Optional[BaseDBAsyncClient] = None,
+        fix: bool = True,
+    ) -> int:
+        """
+        按关联表重新计算读模型列，返回不一致的文章数；fix 为 False 时只检查
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        rows = (
+            await cls.filter(id__in=ids)
+            .using_db(using_db)
+            .values_list(
+                "id",
+                "author__username",
+                "category__name",
+                "author_name",
+                "category_name",
+                "tag_list",
+            )
+        )
+        tags: dict[int, list[str]] = {row[0]: [] for row in rows}
+        for post_id, name in (
+            await Tag.filter(posts__id__in=ids)
+            .using_db(using_db)
+            .order_by("id")
+            .values_list("posts__id", "name")
+        ):
+            tags[post_id].append(name)
+
+        stale = 0
+        now = datetime.now(timezone.utc)
+        for id, author, category, *stored in rows:
+            if stored == [author, category, tags[id]]:
+                continue
+            stale += 1
+            if fix:
+                # 同时更新 updated_at，使文章的 ETag 和快照签名随之变化
+                await cls.filter(id=id).using_db(using_db).update(
+                    author_name=author,
+                    category_name=category,
+                    tag_list=tags[id],
+                    updated_at=now,
+                )
+        return stale
+
+    @classmethod
+    async def reconcile_comment_counts(
+        cls, ids: Optional[Iterable[int]] = None, fix: bool = True
+    ) -> int:
+        return await _reconcile_counts(cls, "comment_count", "comments", ids, fix)
+
+    @classmethod
+    async def release_counts(
+        cls, query: QuerySet["Post"], using_db: Optional[BaseDBAsyncClient] = None
+    ) -> list[int]:
+        """
+        扣除查询到的文章在分类和标签上的计数，返回文章 ID；
+        在删除用户或分类（文章随之级联删除）前于同一事务中调用
+        """
+        rows = await query.using_db(using_db).values_list("id", "category_id")
+        ids = [id for id, _ in rows]
+        if not ids:
+            return ids
+        categories: dict[int, int] = {}
+        for _, category_id in rows:
+            categories[category_id] = categories.get(category_id, 0) - 1
+        tags: dict[int, int] = {}
+        for tag_id, _ in (
+            await Tag.filter(posts__id__in=ids)
+            .using_db(using_db)
+            .values_list("id", "posts__id")
+        ):
+            tags[tag_id] = tags.get(tag_id, 0) - 1
+        await Category.add_post_counts(categories, using_db)
+        await Tag.add_post_counts(tags, using_db)
+        return ids
+
+    @classmethod
+    async def bulk_add_tags(
+        cls,
+        pairs: list[tuple[int, int]],
+        using_db: Optional[BaseDBAsyncClient] = None,
+    ):
+        """
+        用一条 INSERT 批量写入 (文章 ID, 标签 ID) 关联，调用方需保证关联不存在
+        """
+        if not pairs:
+            return
+        field = cls._meta.fields_map["tags"]
+        db = using_db or cls._meta.db
+        table = Table(field.through)  # type: ignore
+        query = db.query_class.into(table).columns(
+            table[field.backward_key], table[field.forward_key]  # type: ignore
+        )
+        for post_id, tag_id in pairs:
+            query = query.insert(post_id, tag_id)
+        await db.execute_query(*query.get_parameterized_sql())
+
     class Meta:  # type: ignore
         table = "posts"
+        indexes = [Index(fields=["created_at", "id"])]
+
+
+class RenderedContent(Model):
+    id = fields.CharField(max_length=32, pk=True)  # xxh3_128(Markdown)
+    html = fields.TextField()  # 渲染后的 HTML
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"RenderedContent({self.id})"
+
+    class Meta:  # type: ignore
+        table = "rendered_contents"
 
 
 class Comment(Model):
@@ -111,12 +435,52 @@ class Comment(Model):
     updated_at = fields.DatetimeField(auto_now=True)
     author = fields.ForeignKeyField("models.User", related_name="comments")  # 作者
     post = fields.ForeignKeyField("models.Post", related_name="comments")
+    parent = fields.ForeignKeyField(
+        "models.Comment", related_name="replies", null=True
+    )  # 回复的评论
 
     def __str__(self):
         return f"Comment({self.content[:50]},{self.id})"
 
+    def to_safe_dict(self):
+        """
+        需要预先加载 author 关系
+        """
+        return models.CommentInfo(
+            id=self.id,
+            post_id=self.post_id,  # type: ignore
+            parent_id=self.parent_id,  # type: ignore
+            content=self.content,
+            author=self.author.username,
+            created_at=self.created_at.isoformat(),
+        )
+
+    @classmethod
+    async def release_counts(
+        cls, query: QuerySet["Comment"], using_db: Optional[BaseDBAsyncClient] = None
+    ) -> int:
+        """
+        扣除查询到的评论及其全部回复（随之级联删除）在文章上的评论数，
+        返回评论总数；在删除评论或其作者前于同一事务中调用
+        """
+        deltas: dict[int, int] = {}
+        seen: set[int] = set()
+        rows = await query.using_db(using_db).values_list("id", "post_id")
+        while rows := [(id, post_id) for id, post_id in rows if id not in seen]:
+            for id, post_id in rows:
+                seen.add(id)
+                deltas[post_id] = deltas.get(post_id, 0) - 1
+            rows = (
+                await cls.filter(parent_id__in=[id for id, _ in rows])
+                .using_db(using_db)
+                .values_list("id", "post_id")
+            )
+        await _add_counts(Post, "comment_count", deltas, using_db)
+        return len(seen)
+
     class Meta:  # type: ignore
         table = "comments"
+        indexes = [Index(fields=["post_id", "parent_id", "created_at", "id"])]
 
 
 class Config(Model):
@@ -124,6 +488,14 @@ class Config(Model):
     key = fields.CharField(max_length=255, unique=True, index=True)  # 配置键
     value = fields.TextField()  # 配置值
 
+    # 进程内配置缓存，写入时失效
+    _cache: ClassVar[Optional[dict[str, str]]] = None
+
+    cache_stats: ClassVar[CacheStats] = CacheStats(lambda: len(Config._cache or ()))
+
+    # 程序内部使用的键（如 app.db 记录的模型结构哈希），不对外公开、导出或修改
+    INTERNAL_KEYS: ClassVar[frozenset[str]] = frozenset({"schema_hash"})
+
     def __str__(self):
         return f"Config({self.key},{self.value})"
 
@@ -131,32 +503,88 @@ class Config(Model):
     async def init(cls):
         if await cls.get_val("init", "n") == "n":
             print("初始化数据库...")
-            for key, value in {
-                "site_title": "My Blog",
-                "site_description": "A blog built with Tortoise ORM",
-                "site_keywords": "tortoise,orm,blog",
-                "site_logo": "",
-                "init": "y",
-            }.items():
-                await cls.set_val(key, value)
+            # 一次写入全部默认配置，已存在的键覆盖为默认值
+            await cls.bulk_create(
+                [
+                    cls(key=key, value=value)
+                    for key, value in {
+                        "site_title": "My Blog",
+                        "site_description": "A blog built with Tortoise ORM",
+                        "site_keywords": "tortoise,orm,blog",
+                        "site_logo": "",
+                        "init": "y",
+                    }.items()
+                ],
+                on_conflict=["key"],
+                update_fields=["value"],
+            )
+            cls.invalidate_cache()
+
+    @classmethod
+    async def load_cache(cls) -> dict[str, str]:
+        """
+        从数据库加载全部配置到缓存
+
+        缓存会一直保留到下次失效，必须从主库读取，否则可能把副本上的旧值缓存下来
+        """
+        rows = await cls.all().using_db(connections.get("default"))
+        cls._cache = {item.key: item.value for item in rows}
+        return cls._cache
+
+    @classmethod
+    async def _cached(cls) -> dict[str, str]:
+        if cls._cache is not None:
+            cls.cache_stats.hit()
+            return cls._cache
+        cls.cache_stats.miss()
+        return await cls.load_cache()
+
+    @classmethod
+    def invalidate_cache(cls):
+        cls._cache = None
+
+    @classmethod
+    async def get_all(cls) -> dict[str, str]:
+        """
+        全部公开配置，不含内部键
+        """
+        cache = await cls._cached()
+        return {
+            key: value for key, value in cache.items() if key not in cls.INTERNAL_KEYS
+        }
 
     @classmethod
     async def get_val(cls, key: str, default: Optional[str] = None):
-        c = await cls.get_or_none(key=key)
-        if c is None:
-            return default
-        return c.value
+        return (await cls._cached()).get(key, default)
 
     @classmethod
     async def set_val(cls, key: str, value: str):
         c = await cls.get_or_create(key=key, defaults={"value": value})
         c[0].value = value
         await c[0].save()
+        cls.invalidate_cache()
 
     class Meta:  # type: ignore
         table = "configs"
 
 
+class CacheEvent(Model):
+    """
+    缓存失效事件，各 worker 按 ID 顺序拉取（见 app.utils.bus）
+    """
+
+    id = fields.BigIntField(pk=True)
+    topic = fields.CharField(max_length=64)  # 缓存类别
+    key = fields.CharField(max_length=255, null=True)  # 失效的条目，为空表示全部
+    created_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    def __str__(self):
+        return f"CacheEvent({self.topic},{self.key})"
+
+    class Meta:  # type: ignore
+        table = "cache_events"
+
+
 class Page(Model):
     id = fields.IntField(pk=True, index=True)
     slug = fields.CharField(max_length=255, unique=True)
@@ -167,6 +595,14 @@ class Page(Model):
     def __str__(self):
         return f"Page({self.slug})"
 
+    def to_safe_dict(self):
+        return models.PageInfo(
+            slug=self.slug,
+            content=self.content,
+            created_at=self.created_at.isoformat(),
+            updated_at=self.updated_at.isoformat(),
+        )
+
     class Meta:  # type: ignore
         table = "pages"
 
@@ -175,7 +611,42 @@ class Resource(Model):
     id = fields.CharField(max_length=32, pk=True, index=True)  # xxh3_128
     path = fields.CharField(max_length=255)  # 资源路径
     desc = fields.CharField(max_length=255)  # 描述
+    content_type = fields.CharField(
+        max_length=255, default="application/octet-stream"
+    )  # MIME 类型
+    size = fields.BigIntField(default=0)  # 字节数
     created_at = fields.DatetimeField(auto_now_add=True)  #  创建时间
 
     def __str__(self):
         return f"Resource({self.id})"
+
+    def to_safe_dict(self):
+        return models.ResourceInfo(
+            id=self.id,
+            desc=self.desc,
+            content_type=self.content_type,
+            size=self.size,
+            created_at=self.created_at.isoformat(),
+        )
+
+
+class UploadSession(Model):
+    id = fields.CharField(max_length=32, pk=True)  # uuid4
+    owner = fields.ForeignKeyField("models.User", related_name="upload_sessions")
+    size = fields.BigIntField()  # 文件总大小
+    received = fields.BigIntField(default=0)  # 已连续写入的字节数
+    desc = fields.CharField(max_length=255)
+    content_type = fields.CharField(max_length=255)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    def __str__(self):
+        return f"UploadSession({self.id})"
+
+    def to_safe_dict(self):
+        return models.UploadSessionInfo(
+            id=self.id, size=self.size, received=self.received
+        )
+
+    class Meta:  # type: ignore
+        table = "upload_sessions"
@@ -0,0 +1,42 @@
+"""
+生产环境启动入口：多 worker，可用时使用 uvloop
+
+    python -m app.serve --workers 4
+
+开发时使用 main.py（单进程、自动重载）。
+"""
+
+import argparse
+import importlib.util
+
+import uvicorn
+
+from .config import server_config
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.serve")
+    parser.add_argument("--host", default=server_config.host)
+    parser.add_argument("--port", type=int, default=server_config.port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=server_config.workers,
+        help="Worker processes (caches stay in sync through the cache event bus)",
+    )
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        proxy_headers=True,
+        access_log=args.access_log,
+    )
+
+
+if __name__ == "__main__":
+    main()
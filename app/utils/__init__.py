@@ -1,8 +1,11 @@
+import time
 from typing import Any, Generic, Mapping, Optional, TypeVar
 
 from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
+from . import timing
+
 T = TypeVar("T")
 
 
@@ -15,18 +18,32 @@ class Response(BaseModel, Generic[T]):
         """
         创建一个响应，可选的数据和自定义消息。
         """
-        return ORJSONResponse(
+        start = time.perf_counter()
+        response = ORJSONResponse(
             status_code=self.status_code,
             content=self.model_dump(),
             headers=headers,
         )
+        timing.record_serialize(time.perf_counter() - start)
+        return response
+
+    def render(self) -> bytes:
+        """
+        序列化为与 ret() 响应体完全相同的字节
+        """
+        return ORJSONResponse(content=self.model_dump()).body
 
     @classmethod
-    def success(cls, data: Optional[T] = None, message: str = "OK") -> "Response[T]":
+    def success(
+        cls,
+        data: Optional[T] = None,
+        message: str = "OK",
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> "Response[T]":
         """
         创建一个成功的响应，可选的数据和自定义消息。
         """
-        return cls(data=data, message=message).ret()
+        return cls(data=data, message=message).ret(headers)
 
     @classmethod
     def error(cls, message: str = "Error", status_code: int = 500) -> "Response":
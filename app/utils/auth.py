@@ -1,14 +1,26 @@
+import asyncio
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Annotated, Optional
+from typing import Annotated, Callable, Optional, TypeVar
 
+import bcrypt
 import jwt
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import ValidationError
+from tortoise import connections
 
 from app.config import server_config
 from app.schema import User
+from app.utils import bus
+from app.utils.cache import TTLCache
+
+# 已验证的 token -> 用户，缓存时间不超过 token 的过期时间
+user_cache: TTLCache[str, User] = TTLCache(
+    server_config.auth_cache_size, server_config.auth_cache_ttl
+)
 
 
 def make_token(user: User, exp=24):
@@ -33,6 +45,41 @@ def verify_token(token: str):
         return None
 
 
+T = TypeVar("T")
+
+# bcrypt 计算耗时较长，放到独立线程池中执行，避免阻塞事件循环
+hash_executor = ThreadPoolExecutor(
+    max_workers=server_config.hash_workers, thread_name_prefix="bcrypt"
+)
+# 正在执行和排队中的哈希任务数
+hash_pending = 0
+
+
+async def run_hash_job(func: Callable[..., T], *args) -> T:
+    """
+    在哈希线程池中执行任务，排队过多时直接返回 503
+    """
+    global hash_pending
+    if hash_pending >= server_config.hash_queue_size:
+        raise HTTPException(status_code=503, detail="Server is busy")
+    hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(hash_executor, func, *args)
+    finally:
+        hash_pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=12)
+    hashed = await run_hash_job(bcrypt.hashpw, password.encode(), salt)
+    return hashed.decode()
+
+
+async def check_password(password: str, hashed: str) -> bool:
+    return await run_hash_job(bcrypt.checkpw, password.encode(), hashed.encode())
+
+
 def check_pwd_policy(password: str):
     if len(password) < 8:
         return False
@@ -46,7 +93,7 @@ def check_pwd_policy(password: str):
 security_scheme = HTTPBearer(auto_error=False)
 
 
-async def extract_token(
+async def extract_header_token(
     request: Request,
     credentials: Annotated[
         Optional[HTTPAuthorizationCredentials], Depends(security_scheme)
@@ -57,7 +104,14 @@ async def extract_token(
         return credentials.credentials
 
     # 优先级 2: Cookie
-    if token := request.cookies.get("token"):
+    return request.cookies.get("token")
+
+
+async def extract_token(
+    request: Request,
+    token: Annotated[Optional[str], Depends(extract_header_token)],
+) -> Optional[str]:
+    if token:
         return token
 
     # 优先级 3: JSON body (安全获取方式)
@@ -71,25 +125,65 @@ async def extract_token(
 
 
 async def get_current_user(token: Annotated[str, Depends(extract_token)]) -> User:
+    return await authenticate(token)
+
+
+async def get_stream_user(
+    token: Annotated[Optional[str], Depends(extract_header_token)],
+) -> User:
+    """
+    用于流式读取请求体的接口：只从请求头和 Cookie 获取 token，
+    未登录时在读取请求体之前返回 401
+    """
+    return await authenticate(token)
+
+
+async def authenticate(token: Optional[str]) -> User:
     if not token:
         raise HTTPException(
             status_code=401,
             detail="Missing authentication token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if (user := user_cache.get(token)) is not None:
+        return user
     try:
         payload = verify_token(token)
         username = payload["data"]  # type: ignore
-    except (ValidationError, ValueError, KeyError) as e:
+    except (ValidationError, ValueError, KeyError, TypeError) as e:
         raise HTTPException(
             status_code=401,
             detail="Invalid token format",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
-    if not (user := await User.get_or_none(username=username)):
+    # 结果会被缓存，必须从主库读取，避免把副本上修改前的用户缓存下来
+    user = (
+        await User.filter(username=username)
+        .using_db(connections.get("default"))
+        .first()
+    )
+    if user is None:
         raise HTTPException(
             status_code=401,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_cache.set(token, user, ttl=payload["exp"] - time.time())  # type: ignore
     return user
+
+
+def invalidate_user(username: str):
+    """
+    用户信息变更或删除后，清除其所有缓存的 token
+    """
+    user_cache.discard_where(lambda user: user.username == username)
+
+
+def _on_users_changed(username: Optional[str]):
+    if username is None:
+        user_cache.clear()
+    else:
+        invalidate_user(username)
+
+
+bus.subscribe("users", _on_users_changed)
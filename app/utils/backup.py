@@ -0,0 +1,347 @@
+"""
+NDJSON 格式的全站备份与恢复
+
+每行一条记录：{"type": "config" | "user" | "category" | "tag" | "post", "data": {...}}，
+按被引用的顺序输出，文章通过用户名、分类名和标签名引用其它记录。
+"""
+
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Optional
+
+import orjson
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from app.schema import Category, Config, Post, Tag, User
+from app.utils import bus
+
+
+def _line(type: str, data: dict) -> bytes:
+    return orjson.dumps({"type": type, "data": data}) + b"\n"
+
+
+async def iter_rows(
+    model: type[Model], batch_size: int, *fields: str, **aliases: str
+) -> AsyncIterator[list[dict]]:
+    """
+    按主键分批遍历整张表，每批一次查询
+    """
+    last_id = 0
+    while True:
+        rows = await (
+            model.filter(id__gt=last_id)
+            .order_by("id")
+            .limit(batch_size)
+            .values("id", *fields, **aliases)
+        )
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield rows
+
+
+async def export_ndjson(batch_size: int = 500) -> AsyncIterator[bytes]:
+    """
+    导出全站数据，每批数据生成一个数据块，内存占用与数据量无关
+    """
+    async for rows in iter_rows(Config, batch_size, "key", "value"):
+        yield b"".join(
+            _line("config", row)
+            for row in rows
+            if row["key"] not in Config.INTERNAL_KEYS
+        )
+    async for rows in iter_rows(
+        User,
+        batch_size,
+        "username",
+        "password",
+        "avatar",
+        "is_admin",
+        "created_at",
+        "updated_at",
+    ):
+        yield b"".join(_line("user", row) for row in rows)
+    async for rows in iter_rows(Category, batch_size, "name"):
+        yield b"".join(_line("category", row) for row in rows)
+    async for rows in iter_rows(Tag, batch_size, "name"):
+        yield b"".join(_line("tag", row) for row in rows)
+    async for rows in iter_rows(
+        Post,
+        batch_size,
+        "title",
+        "summary",
+        "content",
+        "created_at",
+        "updated_at",
+        author="author__username",
+        category="category__name",
+    ):
+        tags: dict[int, list[str]] = {row["id"]: [] for row in rows}
+        for tag in await Tag.filter(posts__id__in=list(tags)).values(
+            "name", post_id="posts__id"
+        ):
+            tags[tag["post_id"]].append(tag["name"])
+        yield b"".join(_line("post", {**row, "tags": tags[row["id"]]}) for row in rows)
+
+
+async def gzip_stream(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip 格式
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    将数据流切分为行（保留空行以便报告行号），gzip 数据（按魔数识别）会被自动解压
+    """
+    decompressor: Optional["zlib._Decompress"] = None
+    first = True
+    buffer = b""
+    async for chunk in chunks:
+        if first and chunk:
+            first = False
+            if chunk[:2] == b"\x1f\x8b":
+                decompressor = zlib.decompressobj(wbits=31)
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer.strip():
+        yield buffer
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _created_at(row: dict) -> dict:
+    # 缺少创建时间时使用当前时间
+    return {"created_at": _datetime(row["created_at"])} if row["created_at"] else {}
+
+
+class BackupFormatError(ValueError):
+    """
+    备份中的某一行无法导入
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+# 各类记录必须包含的字段及其类型
+OPTIONAL_STR = (str, type(None))
+FIELDS: dict[str, dict[str, tuple[type, ...]]] = {
+    "config": {"key": (str,), "value": (str,)},
+    "user": {
+        "username": (str,),
+        "password": (str,),
+        "avatar": OPTIONAL_STR,
+        "is_admin": (bool,),
+        "created_at": OPTIONAL_STR,
+    },
+    "category": {"name": (str,)},
+    "tag": {"name": (str,)},
+    "post": {
+        "id": (int,),
+        "title": (str,),
+        "summary": (str,),
+        "content": (str,),
+        "created_at": OPTIONAL_STR,
+        "author": (str,),
+        "category": (str,),
+        "tags": (list,),
+    },
+}
+
+# 缓冲中的记录：(行号, 数据)
+Row = tuple[int, dict]
+
+
+def _parse(line: bytes, lineno: int) -> tuple[str, dict]:
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError as e:
+        raise BackupFormatError(lineno, "invalid JSON") from e
+    if not isinstance(record, dict) or record.get("type") not in FIELDS:
+        raise BackupFormatError(lineno, "unknown record type")
+    type, data = record["type"], record.get("data")
+    if not isinstance(data, dict):
+        raise BackupFormatError(lineno, "missing data")
+    fields = FIELDS[type]
+    if missing := [key for key in fields if key not in data]:
+        raise BackupFormatError(lineno, f"missing fields {', '.join(missing)}")
+    for key, types in fields.items():
+        value = data[key]
+        # bool 是 int 的子类，ID 不接受 true/false
+        if not isinstance(value, types) or (
+            isinstance(value, bool) and bool not in types
+        ):
+            raise BackupFormatError(lineno, f"invalid {key}")
+    if type == "post" and not all(isinstance(name, str) for name in data["tags"]):
+        raise BackupFormatError(lineno, "invalid tags")
+    if "created_at" in data:
+        try:
+            _datetime(data["created_at"])
+        except (TypeError, ValueError) as e:
+            raise BackupFormatError(lineno, "invalid created_at") from e
+    return type, data
+
+
+class Importer:
+    """
+    流式导入 NDJSON 备份，同类记录攒满一批后一次写入
+
+    配置项会覆盖现有值；同名的用户、标签、分类以及同 ID 的文章会被跳过，不计入
+    导入数量。遇到无法导入的行时抛出 BackupFormatError，之前的批次已经提交。
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+        self.buffers: dict[str, list[Row]] = {type: [] for type in FIELDS}
+        self.counts = {type: 0 for type in self.buffers}
+        self.lineno = 0
+
+    async def feed(self, line: bytes):
+        self.lineno += 1
+        if not line.strip():
+            return
+        type, data = _parse(line, self.lineno)
+        buffer = self.buffers[type]
+        buffer.append((self.lineno, data))
+        if len(buffer) >= self.batch_size:
+            await self.flush(type)
+
+    async def finish(self) -> dict[str, int]:
+        for type in self.buffers:
+            await self.flush(type)
+        # 通知所有 worker 重新加载配置、重建搜索索引
+        await bus.publish("config")
+        await bus.publish("posts")
+        return self.counts
+
+    async def flush(self, type: str):
+        rows, self.buffers[type] = self.buffers[type], []
+        if not rows:
+            return
+        # 文章引用其它记录，先写入之前缓冲的记录
+        if type == "post":
+            for other in ("user", "category", "tag"):
+                await self.flush(other)
+        async with in_transaction("default") as conn:
+            self.counts[type] += await getattr(self, f"_flush_{type}")(rows, conn)
+
+    async def _flush_config(self, rows: list[Row], conn) -> int:
+        # 配置项数量很少，逐条覆盖初始化时写入的默认值；内部键属于源站点，跳过
+        items = [row for _, row in rows if row["key"] not in Config.INTERNAL_KEYS]
+        for row in items:
+            await Config.update_or_create(
+                key=row["key"], defaults={"value": row["value"]}, using_db=conn
+            )
+        return len(items)
+
+    async def _flush_user(self, rows: list[Row], conn) -> int:
+        existing = set(
+            await User.filter(username__in={row["username"] for _, row in rows})
+            .using_db(conn)
+            .values_list("username", flat=True)
+        )
+        users = {
+            row["username"]: row for _, row in rows if row["username"] not in existing
+        }
+        await User.bulk_create(
+            [
+                User(
+                    username=row["username"],
+                    password=row["password"],
+                    avatar=row["avatar"],
+                    is_admin=row["is_admin"],
+                    **_created_at(row),
+                )
+                for row in users.values()
+            ],
+            ignore_conflicts=True,
+            using_db=conn,
+        )
+        return len(users)
+
+    async def _flush_category(self, rows: list[Row], conn) -> int:
+        return await Category.bulk_import_names({row["name"] for _, row in rows}, conn)
+
+    async def _flush_tag(self, rows: list[Row], conn) -> int:
+        return await Tag.bulk_import_names({row["name"] for _, row in rows}, conn)
+
+    async def _flush_post(self, rows: list[Row], conn) -> int:
+        users = dict(
+            await User.filter(username__in={row["author"] for _, row in rows})
+            .using_db(conn)
+            .values_list("username", "id")
+        )
+        categories = dict(
+            await Category.filter(name__in={row["category"] for _, row in rows})
+            .using_db(conn)
+            .values_list("name", "id")
+        )
+        tags = dict(
+            await Tag.filter(name__in={name for _, row in rows for name in row["tags"]})
+            .using_db(conn)
+            .values_list("name", "id")
+        )
+        for lineno, row in rows:
+            if row["author"] not in users:
+                raise BackupFormatError(lineno, f"unknown author {row['author']!r}")
+            if row["category"] not in categories:
+                raise BackupFormatError(lineno, f"unknown category {row['category']!r}")
+            if missing := [name for name in row["tags"] if name not in tags]:
+                raise BackupFormatError(lineno, f"unknown tags {missing!r}")
+        existing = set(
+            await Post.filter(id__in=[row["id"] for _, row in rows])
+            .using_db(conn)
+            .values_list("id", flat=True)
+        )
+        posts = {row["id"]: row for _, row in rows if row["id"] not in existing}
+        if not posts:
+            return 0
+        # 保留原文章 ID，链接保持不变
+        await Post.bulk_create(
+            [
+                Post(
+                    id=row["id"],
+                    title=row["title"],
+                    summary=row["summary"],
+                    content=row["content"],
+                    **_created_at(row),
+                    author_id=users[row["author"]],
+                    category_id=categories[row["category"]],
+                    author_name=row["author"],
+                    category_name=row["category"],
+                    tag_list=sorted(set(row["tags"]), key=tags.__getitem__),
+                )
+                for row in posts.values()
+            ],
+            using_db=conn,
+        )
+        pairs = [
+            (row["id"], tags[name])
+            for row in posts.values()
+            for name in dict.fromkeys(row["tags"])
+        ]
+        await Post.bulk_add_tags(pairs, conn)
+        await Category.add_post_counts(
+            Counter(categories[row["category"]] for row in posts.values()), conn
+        )
+        await Tag.add_post_counts(Counter(tag_id for _, tag_id in pairs), conn)
+        return len(posts)
+
+
+async def import_ndjson(chunks: AsyncIterable[bytes], batch_size: int = 500):
+    importer = Importer(batch_size)
+    async for line in iter_lines(chunks):
+        await importer.feed(line)
+    return await importer.finish()
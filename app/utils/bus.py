@@ -0,0 +1,139 @@
+"""
+跨 worker 的缓存失效通知
+
+每个 worker 都持有进程内缓存（配置、用户、页面、搜索索引）。写入方提交后向
+cache_events 表追加一条事件并立即处理本进程的缓存；其它 worker 周期性拉取
+ID 更大的事件并调用订阅的处理函数。只依赖数据库，不需要额外的服务。
+
+事件 ID 按插入顺序分配，但并发写入可能乱序提交：拉取时较小的 ID 可能尚不可见。
+拉取到的 ID 不连续时记下缺失的 ID，在 cache_event_gap_timeout 内持续补查
+（回滚的插入会永久留下空缺，超时后放弃）。
+"""
+
+import inspect
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, Optional, Union
+
+from loguru import logger
+from tortoise.exceptions import OperationalError
+from tortoise.expressions import Q
+
+from app.config import server_config
+from app.schema import CacheEvent, Config
+
+Handler = Callable[[Optional[str]], Union[None, Awaitable[None]]]
+
+_handlers: dict[str, list[Handler]] = {}
+
+# 已处理到的事件 ID
+_last_id = 0
+
+# 尚未出现的较小事件 ID -> 发现缺失的时间
+_gaps: dict[int, float] = {}
+
+# 一次拉取中记录的缺失 ID 上限，避免 ID 大幅跳跃（如清理后序列继续增长）时占用过多内存
+MAX_GAPS = 1000
+
+# 本进程发布并已处理过的事件，拉取时跳过
+_own: set[int] = set()
+
+
+def subscribe(topic: str, handler: Handler):
+    """
+    订阅一类缓存的失效事件，处理函数接收失效的条目（None 表示全部）
+    """
+    _handlers.setdefault(topic, []).append(handler)
+
+
+async def _dispatch(topic: str, key: Optional[str]):
+    # 写入已经提交，处理函数（重建索引、页面等）出错只记录日志，
+    # 不应让成功的写入变成 500，也不影响其它订阅者
+    for handler in _handlers.get(topic, []):
+        try:
+            result = handler(key)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception(f"Failed to handle cache event {topic}:{key}")
+
+
+async def publish(topic: str, key: Optional[str] = None, local: bool = True):
+    """
+    在写入提交后调用，通知所有 worker；local 为 False 表示调用方已自行更新本进程的缓存
+    """
+    event = await CacheEvent.create(topic=topic, key=key)
+    _own.add(event.id)
+    if local:
+        await _dispatch(topic, key)
+
+
+async def publish_many(topic: str, keys: Iterable[str], limit: int = 100):
+    """
+    多个条目变更时逐条发布，超过 limit 条时改为发布一次全部失效
+    """
+    keys = list(keys)
+    if len(keys) > limit:
+        await publish(topic)
+        return
+    for key in keys:
+        await publish(topic, key)
+
+
+async def start():
+    """
+    以当前最新的事件为起点，需在加载任何缓存之前调用：之前的事件对随后加载的
+    缓存没有意义，加载期间发布的事件则会在之后拉取到
+    """
+    global _last_id
+    try:
+        _last_id = (
+            await CacheEvent.all().order_by("-id").first().values_list("id", flat=True)
+            or 0
+        )
+    except OperationalError:
+        # 事件表尚不存在（新数据库）
+        _last_id = 0
+    _gaps.clear()
+
+
+async def poll():
+    """
+    拉取并处理其它 worker 发布的新事件
+    """
+    global _last_id
+    now = time.monotonic()
+    for id, found_at in list(_gaps.items()):
+        if now - found_at > server_config.cache_event_gap_timeout:
+            del _gaps[id]
+    query = Q(id__gt=_last_id)
+    if _gaps:
+        query |= Q(id__in=list(_gaps))
+    events = (
+        await CacheEvent.filter(query).order_by("id").values_list("id", "topic", "key")
+    )
+    for id, topic, key in events:
+        if id > _last_id:
+            if _last_id and id - _last_id - 1 <= MAX_GAPS:
+                _gaps.update(dict.fromkeys(range(_last_id + 1, id), now))
+            _last_id = id
+        else:
+            _gaps.pop(id, None)
+        if id in _own:
+            _own.discard(id)
+            continue
+        await _dispatch(topic, key)
+
+
+async def prune():
+    """
+    删除过期的事件
+    """
+    expire_at = datetime.now(timezone.utc) - timedelta(
+        seconds=server_config.cache_event_ttl
+    )
+    await CacheEvent.filter(created_at__lt=expire_at).delete()
+
+
+# 模型层不依赖本模块，配置缓存在这里订阅
+subscribe("config", lambda key: Config.invalidate_cache())
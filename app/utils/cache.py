@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    有容量上限的进程内 LRU 缓存，每个条目带过期时间，并记录命中/未命中次数。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expire_at, value = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        """
+        写入缓存，ttl 不超过缓存默认的过期时间
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K):
+        self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[V], bool]):
+        """
+        删除所有值满足条件的条目
+        """
+        for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class CacheStats:
+    """
+    为自行管理存储的缓存（模块级字典、数据库表等）记录命中/未命中次数，
+    stats() 与 TTLCache 一致；size 为空表示条目数无法廉价获得
+    """
+
+    def __init__(self, size: Optional[Callable[[], int]] = None):
+        self.hits = 0
+        self.misses = 0
+        self._size = size
+
+    def hit(self, count: int = 1):
+        self.hits += count
+
+    def miss(self, count: int = 1):
+        self.misses += count
+
+    def stats(self) -> dict[str, Optional[int]]:
+        return {
+            "size": self._size() if self._size is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
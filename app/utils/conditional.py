@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+import orjson
+import xxhash
+from fastapi import Request
+from fastapi.responses import Response as HTTPResponse
+
+
+def make_etag(*parts) -> str:
+    """
+    根据任意可序列化的值生成强 ETag
+    """
+    return etag_of(orjson.dumps(parts))
+
+
+def etag_of(body: bytes) -> str:
+    return f'"{xxhash.xxh3_128_hexdigest(body)}"'
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[datetime] = None
+) -> dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    检查 If-None-Match / If-Modified-Since，两者都存在时以 If-None-Match 为准
+    """
+    if if_none_match := request.headers.get("if-none-match"):
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None):
+    return HTTPResponse(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def conditional(request: Request, response: HTTPResponse):
+    """
+    对已渲染的响应按响应体计算 ETag，未变化时返回 304
+    """
+    etag = etag_of(response.body)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return response
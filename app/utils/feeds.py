@@ -0,0 +1,245 @@
+"""
+Atom 订阅和 sitemap 的缓存
+
+生成结果以字节缓存在进程内。文章变更时（通过 bus 的 posts 事件）只丢弃订阅、
+sitemap 索引和该文章所在的分片，下一次请求时重新生成；分片按文章 ID 划分，
+每个分片一次查询。
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, NamedTuple, Optional, Union
+from xml.sax.saxutils import escape, quoteattr
+
+from tortoise.functions import Max
+
+from app.config import server_config
+from app.schema import Config, Post
+from app.utils import bus
+from app.utils.cache import CacheStats
+from app.utils.conditional import etag_of
+from app.utils.pagination import ORDERING
+
+
+class Document(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]  # 为空表示没有内容（空分片）
+
+
+Key = Union[str, int]  # "feed"、"index" 或分片编号
+
+_documents: dict[Key, Document] = {}
+
+# 失效前的版本，用于判断重新生成后内容是否变化
+_previous: dict[Key, Document] = {}
+
+stats = CacheStats(lambda: len(_documents))
+
+# 每次失效加一，生成期间发生失效时不保存结果，避免缓存旧数据
+_generation = 0
+
+
+def post_url(id: int) -> str:
+    return server_config.post_url_template.format(
+        site_url=server_config.site_url.rstrip("/"), id=id
+    )
+
+
+def _timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _document(
+    key: Key, parts: Iterable[str], last_modified: Optional[datetime]
+) -> Document:
+    body = "".join(parts).encode()
+    etag = etag_of(body)
+    previous = _previous.get(key)
+    # 删除文章后内容变化但最后修改时间可能不变，此时使用当前时间；
+    # Last-Modified 精确到秒，至少向后推一秒
+    if (
+        previous is not None
+        and previous.etag != etag
+        and last_modified is not None
+        and previous.last_modified is not None
+        and last_modified <= previous.last_modified
+    ):
+        last_modified = max(
+            datetime.now(timezone.utc), previous.last_modified + timedelta(seconds=1)
+        )
+    return Document(body, etag, last_modified)
+
+
+def _site_url() -> str:
+    return server_config.site_url.rstrip("/")
+
+
+async def _build_feed() -> Document:
+    posts = await Post.load_summaries(
+        Post.all().order_by(*ORDERING).limit(server_config.feed_size)
+    )
+    config = await Config.get_all()
+    updated = max((post.updated_at for post in posts), default=None)
+    last_modified = datetime.fromisoformat(updated) if updated else None
+    site = _site_url()
+
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(config.get('site_title', ''))}</title>\n",
+        f"<subtitle>{escape(config.get('site_description', ''))}</subtitle>\n",
+        f'<link href={quoteattr(site + "/feed.xml")} rel="self"/>\n',
+        f"<link href={quoteattr(site + '/')}/>\n",
+        f"<id>{escape(site)}/</id>\n",
+    ]
+    if last_modified is not None:
+        parts.append(f"<updated>{_timestamp(last_modified)}</updated>\n")
+    for post in posts:
+        url = post_url(post.id)
+        parts += [
+            "<entry>\n",
+            f"<title>{escape(post.title)}</title>\n",
+            f"<link href={quoteattr(url)}/>\n",
+            f"<id>{escape(url)}</id>\n",
+            f"<published>{_timestamp(datetime.fromisoformat(post.created_at))}"
+            "</published>\n",
+            f"<updated>{_timestamp(datetime.fromisoformat(post.updated_at))}"
+            "</updated>\n",
+            f"<author><name>{escape(post.author)}</name></author>\n",
+            *(f"<category term={quoteattr(tag)}/>\n" for tag in post.tags),
+            f"<summary>{escape(post.summary)}</summary>\n",
+            "</entry>\n",
+        ]
+    parts.append("</feed>\n")
+    return _document("feed", parts, last_modified)
+
+
+async def _build_shard(shard: int) -> Document:
+    size = server_config.sitemap_shard_size
+    rows = (
+        await Post.filter(id__gt=shard * size, id__lte=(shard + 1) * size)
+        .order_by("id")
+        .values_list("id", "updated_at")
+    )
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+    ]
+    for id, updated_at in rows:
+        parts.append(
+            f"<url><loc>{escape(post_url(id))}</loc>"
+            f"<lastmod>{_timestamp(updated_at)}</lastmod></url>\n"
+        )
+    parts.append("</urlset>\n")
+    last_modified = max((updated_at for _, updated_at in rows), default=None)
+    return _document(shard, parts, last_modified)
+
+
+async def _cached(key: Key, build: Callable[[], Awaitable[Document]]) -> Document:
+    if (document := _documents.get(key)) is not None:
+        stats.hit()
+    else:
+        stats.miss()
+        generation = _generation
+        document = await build()
+        if generation == _generation:
+            _documents[key] = document
+            _previous.pop(key, None)
+    return document
+
+
+async def get_feed() -> Document:
+    return await _cached("feed", _build_feed)
+
+
+async def _shard_count() -> int:
+    row = await Post.all().annotate(last=Max("id")).first().values("last")
+    return shard_of(row["last"]) + 1 if row and row["last"] else 0
+
+
+async def _get_shard(shard: int) -> Document:
+    return await _cached(shard, lambda: _build_shard(shard))
+
+
+async def get_shard(shard: int) -> Optional[Document]:
+    """
+    sitemap 分片；超出最大文章 ID 的分片返回 None，不缓存
+    """
+    if shard not in _documents and shard >= await _shard_count():
+        return None
+    return await _get_shard(shard)
+
+
+async def _build_index() -> Document:
+    shards = await _shard_count()
+
+    site = _site_url()
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n',
+    ]
+    last_modified = None
+    for shard in range(shards):
+        document = await _get_shard(shard)
+        if document.last_modified is None:
+            continue
+        if last_modified is None or document.last_modified > last_modified:
+            last_modified = document.last_modified
+        parts.append(
+            f"<sitemap><loc>{escape(f'{site}/sitemap-{shard}.xml')}</loc>"
+            f"<lastmod>{_timestamp(document.last_modified)}</lastmod></sitemap>\n"
+        )
+    parts.append("</sitemapindex>\n")
+    return _document("index", parts, last_modified)
+
+
+async def get_index() -> Document:
+    """
+    sitemap 索引，列出所有非空分片；只有失效的分片会重新生成
+    """
+    return await _cached("index", _build_index)
+
+
+def shard_of(post_id: int) -> int:
+    return (post_id - 1) // server_config.sitemap_shard_size
+
+
+def _drop(key: Key):
+    if (document := _documents.pop(key, None)) is not None:
+        _previous[key] = document
+
+
+def invalidate(post_id: Optional[str] = None):
+    """
+    文章变更后丢弃受影响的缓存，post_id 为空时丢弃全部
+    """
+    global _generation
+    _generation += 1
+    if post_id is None:
+        for key in list(_documents):
+            _drop(key)
+    else:
+        _drop("feed")
+        _drop("index")
+        _drop(shard_of(int(post_id)))
+
+
+def invalidate_feed(key: Optional[str] = None):
+    """
+    订阅的标题和描述来自站点配置
+    """
+    global _generation
+    _generation += 1
+    _drop("feed")
+
+
+async def warm():
+    """
+    启动时预先生成订阅和全部分片
+    """
+    await get_feed()
+    await get_index()
+
+
+bus.subscribe("posts", invalidate)
+bus.subscribe("config", invalidate_feed)
@@ -0,0 +1,68 @@
+import asyncio
+import functools
+from typing import TYPE_CHECKING, Iterable
+
+import xxhash
+from tortoise.exceptions import IntegrityError
+
+from app.schema import RenderedContent
+from app.utils.cache import CacheStats
+
+# 渲染结果保存在数据库中，条目数不在抓取时统计
+stats = CacheStats()
+
+if TYPE_CHECKING:
+    from markdown_it import MarkdownIt
+
+
+@functools.cache
+def parser() -> "MarkdownIt":
+    # 首次渲染时才导入，缩短启动时间
+    from markdown_it import MarkdownIt
+
+    return MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+def content_hash(content: str) -> str:
+    return xxhash.xxh3_128_hexdigest(content.encode())
+
+
+def render(content: str) -> str:
+    return parser().render(content)
+
+
+async def ensure_rendered(content: str) -> str:
+    """
+    获取 Markdown 对应的 HTML，未渲染过时渲染一次并按内容哈希保存
+    """
+    key = content_hash(content)
+    if (cached := await RenderedContent.get_or_none(id=key)) is not None:
+        stats.hit()
+        return cached.html
+    stats.miss()
+    html = await asyncio.to_thread(render, content)
+    try:
+        await RenderedContent.create(id=key, html=html)
+    except IntegrityError:
+        # 并发请求已写入相同内容
+        pass
+    return html
+
+
+async def render_missing(contents: Iterable[str]) -> tuple[int, set[str]]:
+    """
+    批量渲染尚未缓存的内容，返回 (新渲染数量, 全部内容哈希)
+    """
+    batch = {content_hash(content): content for content in contents}
+    existing = set(
+        await RenderedContent.filter(id__in=list(batch)).values_list("id", flat=True)
+    )
+    missing = [key for key in batch if key not in existing]
+    stats.hit(len(batch) - len(missing))
+    stats.miss(len(missing))
+    htmls = await asyncio.to_thread(lambda: [render(batch[key]) for key in missing])
+    await RenderedContent.bulk_create(
+        [RenderedContent(id=key, html=html) for key, html in zip(missing, htmls)],
+        ignore_conflicts=True,
+    )
+    return len(missing), set(batch)
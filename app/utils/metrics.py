@@ -0,0 +1,160 @@
+"""
+进程内指标，以 Prometheus 文本格式输出
+
+所有记录都在事件循环线程中进行，只做字典查找和整数加法，无需加锁。
+"""
+
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+
+# 默认的延迟分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry: list["Metric"] = []
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        registry.append(self)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.samples()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, value: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def set(self, *labels: str, value: float):
+        """
+        直接设置值，用于在别处累计、抓取时读取的计数
+        """
+        self.values[labels] = value
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, value: float = 1):
+        self.inc(*labels, value=-value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # 每个标签组合：[各桶计数（不累计）..., 超出最大桶的计数], 总和
+        self.values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, *labels: str, value: float):
+        item = self.values.get(labels)
+        if item is None:
+            item = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = item
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = _labels(self.label_names, labels, le=_number(bound))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_str = _labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_str} {_number(total[0])}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+def render() -> str:
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+http_requests = Counter(
+    "moblog_http_requests_total",
+    "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+http_duration = Histogram(
+    "moblog_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route"),
+)
+http_in_flight = Gauge(
+    "moblog_http_requests_in_flight", "HTTP requests being processed"
+)
+db_queries = Counter(
+    "moblog_db_queries_total", "SQL queries by route template", ("method", "route")
+)
+db_seconds = Counter(
+    "moblog_db_seconds_total",
+    "Time spent in SQL queries by route template",
+    ("method", "route"),
+)
+
+
+def observe_request(
+    method: str,
+    route: Optional[str],
+    status: int,
+    duration: float,
+    queries: int,
+    db_time: float,
+):
+    """
+    记录一个已完成的请求；未匹配到路由的请求归为同一组，避免标签数量无限增长
+    """
+    route = route or "<unmatched>"
+    http_requests.inc(method, route, str(status))
+    http_duration.observe(method, route, value=duration)
+    if queries:
+        db_queries.inc(method, route, value=queries)
+        db_seconds.inc(method, route, value=db_time)
@@ -0,0 +1,56 @@
+"""
+独立页面的内存快照
+
+页面很少修改却几乎每次访问都会读取，因此启动时把全部页面序列化好放在内存中，
+读取时不访问数据库；通过管理接口修改页面后整体重建快照。
+"""
+
+import asyncio
+from typing import NamedTuple, Optional
+
+import orjson
+
+from app.schema import Page
+from app.utils import Response, bus
+from app.utils.cache import CacheStats
+from app.utils.conditional import etag_of
+
+
+class PageEntry(NamedTuple):
+    body: bytes  # 已序列化的响应体
+    etag: str
+
+
+# slug -> 页面，重建时整体替换而不是原地修改，读取方不会看到不完整的快照
+snapshot: dict[str, PageEntry] = {}
+
+_lock = asyncio.Lock()
+
+# 快照包含全部页面，未命中即页面不存在
+stats = CacheStats(lambda: len(snapshot))
+
+
+def serialize(page: Page) -> PageEntry:
+    body = orjson.dumps(Response(data=page.to_safe_dict()).model_dump())
+    return PageEntry(body, etag_of(body))
+
+
+async def rebuild():
+    """
+    从数据库重新加载全部页面并替换快照
+    """
+    global snapshot
+    # 串行重建，保证最后完成的一次反映最新的数据
+    async with _lock:
+        snapshot = {page.slug: serialize(page) for page in await Page.all()}
+
+
+def get(slug: str) -> Optional[PageEntry]:
+    if (entry := snapshot.get(slug)) is not None:
+        stats.hit()
+    else:
+        stats.miss()
+    return entry
+
+
+bus.subscribe("pages", lambda key: rebuild())
@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+from app.models import GetPostResult, PostView
+from app.schema import Post
+
+# 文章列表统一按 (created_at, id) 倒序，与 Post 上的联合索引一致
+ORDERING = ("-created_at", "-id")
+
+
+def encode_cursor(created_at: str, id: int) -> str:
+    """
+    将 (created_at, id) 编码为不透明的游标
+    """
+    return base64.urlsafe_b64encode(orjson.dumps([created_at, id])).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    解码游标，格式错误时返回 400
+    """
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+async def paginate_posts(
+    query: QuerySet[Post],
+    page: int = 1,
+    per_page: int = 10,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    cursor: bool = False,
+    view: PostView = "full",
+    total: Optional[int] = None,
+) -> GetPostResult:
+    """
+    分页加载文章列表
+
+    默认使用 OFFSET 分页并返回总数；传入 cursor、after 或 before 时使用
+    基于 (created_at, id) 的游标分页，不再计算总数，翻到任意深度代价相同。
+    view 为 summary 时只查询摘要所需的列，不返回正文。
+    已知总数（如标签、分类上维护的文章数）时通过 total 传入，省去 COUNT 查询。
+    """
+    load = Post.load_list if view == "full" else Post.load_summaries
+    if not (cursor or after or before):
+        offset = (page - 1) * per_page
+        posts = await load(query.order_by(*ORDERING).offset(offset).limit(per_page))
+        if total is None:
+            total = await query.count()
+        return GetPostResult(posts=posts, total=total, page=page, per_page=per_page)
+
+    if before:
+        # 向前翻页：按正序取更新的文章，再反转回倒序
+        created_at, id = decode_cursor(before)
+        query = query.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=id)
+        ).order_by("created_at", "id")
+    else:
+        if after:
+            created_at, id = decode_cursor(after)
+            query = query.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id)
+            )
+        query = query.order_by(*ORDERING)
+
+    # 多取一条用于判断是否还有下一页
+    posts = await load(query.limit(per_page + 1))
+    has_more = len(posts) > per_page
+    posts = posts[:per_page]
+    if before:
+        posts.reverse()
+
+    next_cursor = prev_cursor = None
+    if posts:
+        first, last = posts[0], posts[-1]
+        if has_more or before:
+            next_cursor = encode_cursor(last.created_at, last.id)
+        if (has_more and before) or after:
+            prev_cursor = encode_cursor(first.created_at, first.id)
+
+    return GetPostResult(
+        posts=posts,
+        total=None,
+        page=page,
+        per_page=per_page,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
@@ -0,0 +1,230 @@
+import heapq
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+import orjson
+from loguru import logger
+from tortoise.functions import Count, Max
+
+from app.config import server_config
+from app.schema import Post, Tag
+from app.utils import bus
+
+# 中日韩文字没有空格分词，按字和相邻两字切分
+CJK = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+TOKEN_RE = re.compile(f"([{CJK}]+)|([^\\W_{CJK}]+)")
+
+# 各字段的词频权重
+FIELD_WEIGHTS = {"title": 3, "tags": 2, "summary": 2, "content": 1}
+
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str, query: bool = False) -> list[str]:
+    """
+    分词：拉丁文字按单词切分并转小写，中日韩文字切为单字和双字
+
+    查询时中日韩文字只使用双字（单个字时使用单字），以提高准确度。
+    """
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(text):
+        if word:
+            tokens.append(word.lower())
+            continue
+        if len(cjk) == 1 or not query:
+            tokens.extend(cjk)
+        tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+class SearchIndex:
+    """
+    进程内倒排索引，使用 BM25 排序
+    """
+
+    def __init__(self):
+        self.docs: dict[int, dict[str, int]] = {}
+        self.doc_len: dict[int, int] = {}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(
+        self, doc_id: int, title: str, summary: str, content: str, tags: Iterable[str]
+    ):
+        terms: Counter[str] = Counter()
+        for field, text in (
+            ("title", title),
+            ("summary", summary),
+            ("content", content),
+            ("tags", " ".join(tags)),
+        ):
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                terms[token] += weight
+        self._set(doc_id, dict(terms))
+
+    def _set(self, doc_id: int, terms: dict[str, int]):
+        self.remove(doc_id)
+        self.docs[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_len[doc_id] = length
+        self.total_len += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: int):
+        terms = self.docs.pop(doc_id, None)
+        if terms is None:
+            return
+        self.total_len -= self.doc_len.pop(doc_id)
+        for term in terms:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+    def search(self, q: str, limit: int, offset: int = 0) -> tuple[list[int], int]:
+        """
+        返回 (按得分排序的文章 ID, 命中总数)
+        """
+        n = len(self.docs)
+        if n == 0:
+            return [], 0
+        avg_len = self.total_len / n
+        scores: dict[int, float] = {}
+        for term in set(tokenize(q, query=True)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = K1 * (1 - B + B * self.doc_len[doc_id] / avg_len)
+                score = idf * tf * (K1 + 1) / (tf + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda x: x[1])
+        return [doc_id for doc_id, _ in top[offset:]], len(scores)
+
+    def dump(self, fingerprint) -> bytes:
+        return orjson.dumps(
+            {"fingerprint": fingerprint, "docs": self.docs},
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+    def load(self, data: dict):
+        self.__init__()
+        for doc_id, terms in data["docs"].items():
+            self._set(int(doc_id), terms)
+
+
+search_index = SearchIndex()
+
+
+async def index_post(post_id: int):
+    """
+    重新索引一篇文章（创建或更新后调用）
+    """
+    post = await Post.get_or_none(id=post_id).prefetch_related("tags")
+    if post is None:
+        search_index.remove(post_id)
+        return
+    search_index.add(
+        post.id,
+        post.title,
+        post.summary,
+        post.content,
+        [tag.name for tag in post.tags],
+    )
+
+
+async def build_index(batch_size: int = 500):
+    """
+    从数据库分批构建索引
+    """
+    search_index.__init__()
+    last_id = 0
+    while True:
+        rows = await (
+            Post.filter(id__gt=last_id)
+            .order_by("id")
+            .limit(batch_size)
+            .values("id", "title", "summary", "content")
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        tags: dict[int, list[str]] = {row["id"]: [] for row in rows}
+        for tag in await Tag.filter(posts__id__in=list(tags)).values(
+            "name", post_id="posts__id"
+        ):
+            tags[tag["post_id"]].append(tag["name"])
+        for row in rows:
+            search_index.add(
+                row["id"], row["title"], row["summary"], row["content"], tags[row["id"]]
+            )
+
+
+async def _on_posts_changed(post_id: Optional[str]):
+    if post_id is None:
+        await build_index()
+    else:
+        await index_post(int(post_id))
+
+
+bus.subscribe("posts", _on_posts_changed)
+
+
+async def fingerprint() -> list:
+    """
+    文章表的指纹：文章数与最后更新时间，用于判断快照是否过期
+    """
+    row = (
+        await Post.all()
+        .annotate(count=Count("id"), last=Max("updated_at"))
+        .first()
+        .values("count", "last")
+    )
+    last = row["last"] if row else None
+    return [row["count"] if row else 0, str(last) if last else None]
+
+
+async def load_or_build():
+    """
+    启动时加载索引快照，快照不存在或已过期时从数据库重建
+    """
+    path = server_config.search_index_path
+    current = await fingerprint()
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+            if data["fingerprint"] == current:
+                search_index.load(data)
+                logger.info(f"Loaded search index of {len(search_index)} posts")
+                return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load search index snapshot: {e}")
+    await build_index()
+    logger.info(f"Built search index of {len(search_index)} posts")
+    await save(current)
+
+
+async def save(current: Optional[list] = None):
+    """
+    将索引写入快照文件（先写临时文件再替换）
+    """
+    path = server_config.search_index_path
+    if not path:
+        return
+    data = search_index.dump(current or await fingerprint())
+    # 各 worker 都会保存，临时文件按进程区分，避免互相覆盖写了一半的文件
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
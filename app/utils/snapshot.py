@@ -0,0 +1,174 @@
+"""
+将常用的只读接口预先渲染为静态 JSON 文件，交给 nginx 或 CDN 直接返回
+
+文件布局与 URL 对应：
+
+    /posts/                 -> posts/index.json
+    /posts/?page=N          -> posts/pages/N.json
+    /posts/{id}             -> posts/{id}.json
+    /tags/                  -> tags/index.json
+    /setting/get_all        -> setting/get_all.json
+
+nginx 示例（未命中时回源到 API）：
+
+    location ~ ^/(posts|tags)/$ {
+        try_files /$1/index.json @api;  # 带查询参数的请求应直接回源
+    }
+    location ~ ^/(posts/\\d+|setting/get_all)$ { try_files $uri.json @api; }
+
+响应体通过 Response.render() 生成，与在线接口逐字节一致。增量模式根据上次运行
+记录的各文章 (updated_at, comment_count) 只重新渲染有变化的文章，列表页和其它
+文件只在内容变化时改写。用户改名或删除标签时会同时更新相关文章的 updated_at，
+同样会被重新渲染。
+"""
+
+import gzip
+import os
+
+import orjson
+from loguru import logger
+
+from app.schema import Config, Post, Tag
+from app.utils import Response
+from app.utils.conditional import etag_of
+from app.utils.pagination import paginate_posts
+
+MANIFEST = ".snapshot.json"
+
+
+class Snapshot:
+    def __init__(self, root: str, precompress: bool = False):
+        self.root = root
+        self.precompress = precompress
+        # 相对路径 -> ETag，文章 ID -> [updated_at, comment_count]
+        self.files: dict[str, str] = {}
+        self.posts: dict[str, list] = {}
+        # 上次运行是否生成了 .gz 文件
+        self.precompressed = False
+        # 本次运行保留的文件，其余上次生成的文件会被删除
+        self.current: set[str] = set()
+        self.written = 0
+        self.skipped = 0
+
+    def load_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                manifest = orjson.loads(f.read())
+            self.files = manifest["files"]
+            self.posts = manifest["posts"]
+            self.precompressed = manifest.get("precompress", False)
+
+    def save_manifest(self):
+        self._write_file(
+            MANIFEST,
+            orjson.dumps(
+                {
+                    "files": self.files,
+                    "posts": self.posts,
+                    "precompress": self.precompress,
+                }
+            ),
+        )
+
+    def _write_file(self, path: str, body: bytes):
+        # 先写临时文件再替换，服务器不会读到写了一半的文件
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(full + ".tmp", full)
+
+    def write(self, path: str, response: Response):
+        self.current.add(path)
+        body = response.render()
+        etag = etag_of(body)
+        unchanged = self.files.get(path) == etag
+        if not unchanged:
+            self._write_file(path, body)
+            self.files[path] = etag
+        # .gz 与当前设置保持一致：新开启时补写，关闭后删除，避免返回过期的压缩内容
+        gz = os.path.join(self.root, path + ".gz")
+        if self.precompress:
+            if not unchanged or not os.path.exists(gz):
+                # mtime 固定为 0，内容相同时压缩结果也相同
+                self._write_file(path + ".gz", gzip.compress(body, mtime=0))
+                unchanged = False
+        elif os.path.exists(gz):
+            os.remove(gz)
+        if unchanged:
+            self.skipped += 1
+        else:
+            self.written += 1
+
+    def remove(self, path: str):
+        for name in (path, path + ".gz"):
+            full = os.path.join(self.root, name)
+            if os.path.exists(full):
+                os.remove(full)
+        self.files.pop(path, None)
+
+
+async def build_snapshot(
+    root: str,
+    incremental: bool = False,
+    precompress: bool = False,
+    list_pages: int = 10,
+    per_page: int = 10,
+    batch_size: int = 500,
+) -> Snapshot:
+    """
+    渲染静态快照，list_pages 为预渲染的文章列表页数，更深的页回源到 API
+    """
+    snapshot = Snapshot(root, precompress)
+    snapshot.load_manifest()
+    previous = set(snapshot.files)
+    if not incremental:
+        snapshot.files, snapshot.posts = {}, {}
+    elif snapshot.precompressed != precompress:
+        # 签名未变的文章不会经过 write()，需要全部重新渲染以补写或删除 .gz
+        snapshot.posts = {}
+
+    # 文章详情：只渲染签名变化的文章
+    signatures = {
+        str(id): [updated_at.isoformat(), comment_count]
+        for id, updated_at, comment_count in await Post.all().values_list(
+            "id", "updated_at", "comment_count"
+        )
+    }
+    changed = []
+    for id, signature in signatures.items():
+        if snapshot.posts.get(id) == signature:
+            snapshot.current.add(f"posts/{id}.json")
+        else:
+            changed.append(int(id))
+    for i in range(0, len(changed), batch_size):
+        for info in await Post.load_list(
+            Post.filter(id__in=changed[i : i + batch_size])
+        ):
+            snapshot.write(f"posts/{info.id}.json", Response(data=info))
+    snapshot.posts = signatures
+
+    # 列表页：重新渲染，内容变化时才改写
+    pages = max(1, (len(signatures) + per_page - 1) // per_page)
+    for page in range(1, min(pages, list_pages) + 1):
+        response = Response(data=await paginate_posts(Post.all(), page, per_page))
+        if page == 1:
+            snapshot.write("posts/index.json", response)
+        snapshot.write(f"posts/pages/{page}.json", response)
+
+    snapshot.write(
+        "tags/index.json",
+        Response(data=[tag.to_safe_dict() for tag in await Tag.all()]),
+    )
+    snapshot.write("setting/get_all.json", Response(data=await Config.get_all()))
+
+    # 已删除的文章和不再存在的列表页
+    for path in previous - snapshot.current:
+        snapshot.remove(path)
+    snapshot.save_manifest()
+    logger.info(
+        f"Snapshot written to {root}: {snapshot.written} files written, "
+        f"{snapshot.skipped} unchanged, {len(changed)} posts rendered"
+    )
+    return snapshot
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable
+
+import xxhash
+from fastapi import HTTPException
+from loguru import logger
+
+from app.config import server_config
+from app.schema import UploadSession
+
+# 可以在浏览器中直接打开的类型；SVG 可以包含脚本，不在其中
+INLINE_TYPES = ("image/", "video/", "audio/")
+INLINE_EXCLUDED = ("image/svg+xml",)
+
+
+def is_inline(content_type: str) -> bool:
+    """
+    资源的类型由上传者指定，只有不会被当作页面执行的类型才允许内联显示
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith(INLINE_TYPES) and media_type not in INLINE_EXCLUDED
+
+
+def resource_path(key: str) -> str:
+    """
+    资源的相对存储路径，按哈希前两位分目录
+    """
+    return os.path.join(key[:2], key)
+
+
+def absolute_path(path: str) -> str:
+    return os.path.join(server_config.resource_dir, path)
+
+
+def temp_path(name: str = "") -> str:
+    tmp_dir = os.path.join(server_config.resource_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, name or uuid.uuid4().hex)
+
+
+async def receive_to_temp(chunks: AsyncIterable[bytes]) -> tuple[str, str, int]:
+    """
+    将上传的数据流分块写入临时文件，同时增量计算 xxh3_128
+
+    文件读写都在线程池中执行，不阻塞事件循环。
+    返回 (哈希, 临时文件路径, 大小)，超过大小限制时返回 413。
+    """
+    hasher = xxhash.xxh3_128()
+    size = 0
+    tmp = await asyncio.to_thread(temp_path)
+
+    def write(f, chunk: bytes):
+        hasher.update(chunk)
+        f.write(chunk)
+
+    f = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > server_config.resource_max_size:
+                raise HTTPException(status_code=413, detail="File is too large")
+            await asyncio.to_thread(write, f, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(remove_file, tmp)
+        raise
+    await asyncio.to_thread(f.close)
+    return hasher.hexdigest(), tmp, size
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def commit_file(tmp: str, key: str) -> str:
+    """
+    将临时文件移动到内容地址对应的位置；相同内容已存在时直接丢弃临时文件
+    """
+    path = resource_path(key)
+    target = absolute_path(path)
+    if os.path.exists(target):
+        os.remove(tmp)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp, target)
+    return path
+
+
+def session_path(session_id: str) -> str:
+    return temp_path(f"upload-{session_id}")
+
+
+def preallocate(path: str, size: int):
+    """
+    创建指定大小的空文件，支持时直接分配磁盘空间
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        if hasattr(os, "posix_fallocate") and size > 0:
+            os.posix_fallocate(fd, 0, size)
+        else:
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+async def write_at(path: str, offset: int, limit: int, chunks: AsyncIterable[bytes]):
+    """
+    从 offset 开始按位置写入数据流，返回写入结束的位置，超出 limit 时返回 413
+    """
+    fd = await asyncio.to_thread(os.open, path, os.O_WRONLY)
+    try:
+        async for chunk in chunks:
+            if offset + len(chunk) > limit:
+                raise HTTPException(status_code=413, detail="Chunk exceeds file size")
+            await asyncio.to_thread(os.pwrite, fd, chunk, offset)
+            offset += len(chunk)
+    finally:
+        await asyncio.to_thread(os.close, fd)
+    return offset
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    hasher = xxhash.xxh3_128()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+async def gc_upload_sessions():
+    """
+    清理长时间未活动的上传会话及其临时文件
+    """
+    expire = datetime.now(timezone.utc) - timedelta(
+        seconds=server_config.upload_session_ttl
+    )
+    stale = await UploadSession.filter(updated_at__lt=expire).values_list(
+        "id", flat=True
+    )
+    for session_id in stale:
+        await asyncio.to_thread(remove_file, session_path(session_id))
+    if stale:
+        await UploadSession.filter(id__in=stale).delete()
+        logger.info(f"Removed {len(stale)} stale upload sessions")
@@ -0,0 +1,29 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+_tasks: list[asyncio.Task] = []
+
+
+def every(seconds: float, func: Callable[[], Awaitable]):
+    """
+    在后台周期性执行任务，异常只记录日志不会中断循环
+    """
+
+    async def loop():
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await func()
+            except Exception:
+                logger.exception(f"Periodic task {func.__name__} failed")
+
+    _tasks.append(asyncio.create_task(loop()))
+
+
+async def stop_all():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,156 @@
+"""
+请求级耗时统计
+
+每个请求记录 SQL 次数与数据库耗时、响应序列化耗时，通过 Server-Timing 响应头返回；
+超过阈值的 SQL 会连同路由一起记录到日志中。
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from loguru import logger
+from tortoise import BaseDBAsyncClient
+
+from app.config import server_config
+from app.utils import metrics
+
+QUERY_METHODS = (
+    "execute_insert",
+    "execute_query",
+    "execute_query_dict",
+    "execute_many",
+    "execute_script",
+)
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_time", "serialize_time")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+    @property
+    def route_template(self) -> Optional[str]:
+        # 路由匹配后 FastAPI 会把 route 写入同一个 scope
+        if self.scope is None:
+            return None
+        return getattr(self.scope.get("route"), "path", None)
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "-"
+        return f"{self.scope['method']} {self.route_template or self.scope['path']}"
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", '
+            f"serialize;dur={self.serialize_time * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+
+current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+# 部分数据库后端的 execute_* 方法会互相调用，只统计最外层的一次
+_in_query: ContextVar[bool] = ContextVar("in_query", default=False)
+
+
+def record_serialize(seconds: float):
+    if (stats := current.get()) is not None:
+        stats.serialize_time += seconds
+
+
+def _instrument(func):
+    @functools.wraps(func)
+    async def wrapper(self, query, *args, **kwargs):
+        if _in_query.get():
+            return await func(self, query, *args, **kwargs)
+        token = _in_query.set(True)
+        start = time.perf_counter()
+        try:
+            return await func(self, query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _in_query.reset(token)
+            stats = current.get()
+            if stats is not None:
+                stats.queries += 1
+                stats.db_time += elapsed
+            if elapsed * 1000 >= server_config.slow_query_ms:
+                route = stats.route if stats is not None else "-"
+                logger.warning(
+                    f"Slow query ({elapsed * 1000:.1f}ms) in {route}: {query[:2000]}"
+                )
+
+    wrapper.__instrumented__ = True  # type: ignore
+    return wrapper
+
+
+def _subclasses(cls: type) -> list[type]:
+    result = [cls]
+    for sub in cls.__subclasses__():
+        result.extend(_subclasses(sub))
+    return result
+
+
+def install_db_hooks():
+    """
+    为所有已加载的数据库客户端类的 execute_* 方法加上计时，需在 Tortoise.init 之后调用
+    """
+    for cls in _subclasses(BaseDBAsyncClient):
+        for name in QUERY_METHODS:
+            func = cls.__dict__.get(name)
+            if func is None or getattr(func, "__instrumented__", False):
+                continue
+            setattr(cls, name, _instrument(func))
+
+
+class TimingMiddleware:
+    """
+    为每个请求建立统计上下文，记录请求指标，并在响应头中加入 Server-Timing
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if server_config.server_timing:
+                    header = stats.server_timing(time.perf_counter() - start)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", header.encode()),
+                    ]
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+            metrics.http_in_flight.dec()
+            metrics.observe_request(
+                scope["method"],
+                stats.route_template,
+                status,
+                time.perf_counter() - start,
+                stats.queries,
+                stats.db_time,
+            )
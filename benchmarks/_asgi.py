@@ -0,0 +1,74 @@
+"""
+基准测试公用工具：不依赖 HTTP 客户端，直接调用 ASGI 应用
+"""
+
+import statistics
+from typing import Mapping, Optional
+from urllib.parse import urlencode
+
+import orjson
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    params: Optional[Mapping] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    json=None,
+) -> tuple[int, dict[str, str], bytes]:
+    """
+    发送一个请求，返回 (状态码, 响应头, 响应体)
+    """
+    body = b"" if json is None else orjson.dumps(json)
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if json is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": urlencode(params or {}).encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status = 0
+    resp_headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for k, v in message.get("headers", []):
+                resp_headers[k.decode().lower()] = v.decode()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, resp_headers, b"".join(chunks)
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """
+    计算 p50/p95/p99（毫秒）
+    """
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": q[49] * 1000, "p95": q[94] * 1000, "p99": q[98] * 1000}
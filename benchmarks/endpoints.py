@@ -0,0 +1,294 @@
+"""
+主要接口的基准测试：在本地 SQLite 数据库中生成数据，通过 ASGI 直接并发请求，
+统计吞吐量、p50/p95/p99 延迟和每个请求的 SQL 查询数，并输出 JSON 结果便于对比。
+
+    python -m benchmarks.endpoints --posts 100000 --tags 2000 --categories 500
+    python -m benchmarks.endpoints --output new.json --baseline old.json
+
+数据库文件会被保留，再次运行时直接复用（--reseed 重新生成）。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import platform
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import orjson
+
+from ._asgi import percentiles, request
+
+PASSWORD = "benchmark1"
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. 敏捷的棕色狐狸跳过了懒狗。"
+).split()
+
+
+class QueryCounter(logging.Handler):
+    """
+    通过 Tortoise 的调试日志统计执行的 SQL 数量
+    """
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord):
+        self.count += 1
+
+
+query_counter = QueryCounter()
+
+
+def paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(LOREM, k=words))
+
+
+async def seed(args, rng: random.Random):
+    from app import db
+    from app.schema import Category, Post, Tag, User
+    from app.utils import auth
+
+    start = time.perf_counter()
+    author = await User.create(
+        username="bench", password=await auth.hash_password(PASSWORD), is_admin=True
+    )
+    await Category.bulk_create(
+        [Category(name=f"category-{i}") for i in range(args.categories)]
+    )
+    await Tag.bulk_create([Tag(name=f"tag-{i}") for i in range(args.tags)])
+    category_ids = await Category.all().values_list("id", flat=True)
+    tag_ids = await Tag.all().values_list("id", flat=True)
+
+    epoch = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    batch = 1000
+    for first in range(1, args.posts + 1, batch):
+        ids = range(first, min(first + batch, args.posts + 1))
+        await Post.bulk_create(
+            [
+                Post(
+                    id=id,
+                    title=paragraph(rng, 6),
+                    summary=paragraph(rng, 30),
+                    content="\n\n".join(
+                        paragraph(rng, 80) for _ in range(args.paragraphs)
+                    ),
+                    author=author,
+                    category_id=rng.choice(category_ids),
+                    created_at=epoch + timedelta(minutes=id),
+                )
+                for id in ids
+            ]
+        )
+        await Post.bulk_add_tags(
+            [
+                (id, tag_id)
+                for id in ids
+                for tag_id in rng.sample(tag_ids, min(args.tags_per_post, len(tag_ids)))
+            ]
+        )
+    # 直接批量写入，未经过接口，需要补齐文章读模型和标签、分类的文章数
+    await db.check_read_model(fix=True)
+    await db.reconcile_counts()
+    print(f"Seeded {args.posts} posts in {time.perf_counter() - start:.1f}s")
+
+
+async def run_scenario(
+    app,
+    make_request: Callable[[random.Random], tuple],
+    total: int,
+    concurrency: int,
+    rng: random.Random,
+) -> dict:
+    """
+    用 concurrency 个并发任务发出 total 个请求
+    """
+    samples: list[float] = []
+    statuses: dict[int, int] = {}
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, params = make_request(rng)
+            start = time.perf_counter()
+            status, _, _ = await request(app, method, path, params=params)
+            samples.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    queries = query_counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    queries = query_counter.count - queries
+
+    return {
+        "requests": total,
+        "errors": total - statuses.get(200, 0),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "elapsed": elapsed,
+        "throughput": total / elapsed if elapsed else 0.0,
+        **percentiles(samples),
+        "queries_per_request": queries / total if total else 0.0,
+    }
+
+
+def scenarios(args, counts: dict[str, int]) -> dict[str, tuple[Callable, int]]:
+    """
+    场景名 -> (请求生成函数, 请求数)
+    """
+    pages = max(1, min(counts["posts"] // 10, 50))
+
+    def posts(rng):
+        return "GET", "/posts/", {"page": rng.randint(1, pages), "per_page": 10}
+
+    def post_detail(rng):
+        return "GET", f"/posts/{rng.randint(1, counts['posts'])}", None
+
+    def tag_posts(rng):
+        return "GET", f"/tags/{rng.randint(1, counts['tags'])}", {"per_page": 10}
+
+    def category_posts(rng):
+        return (
+            "GET",
+            f"/categories/{rng.randint(1, counts['categories'])}",
+            {"per_page": 10},
+        )
+
+    def settings(rng):
+        return "GET", "/setting/get_all", None
+
+    def login(rng):
+        return "POST", "/login", {"username": "bench", "password": PASSWORD}
+
+    reads = [posts, post_detail, tag_posts, category_posts, settings]
+
+    def mixed(rng):
+        return rng.choice(reads)(rng)
+
+    return {
+        "posts": (posts, args.requests),
+        "post_detail": (post_detail, args.requests),
+        "tag_posts": (tag_posts, args.requests),
+        "category_posts": (category_posts, args.requests),
+        "settings": (settings, args.requests),
+        "login": (login, args.login_requests),
+        "mixed": (mixed, args.requests),
+    }
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, "rb") as f:
+        baseline = orjson.loads(f.read())["results"]
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("throughput", "p50", "p99", "queries_per_request"):
+            if old[key]:
+                changes.append(f"{key} {(result[key] / old[key] - 1) * 100:+.1f}%")
+        print(f"{name:<16}" + "  ".join(changes))
+
+
+async def main(args):
+    from app import app, db
+    from app.schema import Category, Post, Tag
+    from app.utils import search
+
+    db.ORM_CONFIG["connections"]["default"] = f"sqlite://{args.db}"
+    rng = random.Random(args.seed)
+
+    async with app.router.lifespan_context(app):
+        if not await Post.exists():
+            await seed(args, rng)
+            await search.build_index()
+        counts = {
+            "posts": await Post.all().count(),
+            "tags": await Tag.all().count(),
+            "categories": await Category.all().count(),
+        }
+        print(f"Dataset: {counts}")
+
+        logger = logging.getLogger("tortoise.db_client")
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(query_counter)
+
+        results = {}
+        for name, (make_request, total) in scenarios(args, counts).items():
+            if args.only and name not in args.only:
+                continue
+            if name != "login":
+                await run_scenario(
+                    app, make_request, args.warmup, args.concurrency, rng
+                )
+            results[name] = result = await run_scenario(
+                app, make_request, total, args.concurrency, rng
+            )
+            print(
+                f"{name:<16}{result['throughput']:>9.1f} req/s"
+                f"  p50 {result['p50']:>7.2f}ms  p95 {result['p95']:>7.2f}ms"
+                f"  p99 {result['p99']:>7.2f}ms"
+                f"  {result['queries_per_request']:>5.2f} queries/req"
+                f"  errors {result['errors']}"
+            )
+
+        logger.removeHandler(query_counter)
+
+    report = {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": counts,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default="benchmark.sqlite3", help="SQLite file")
+    parser.add_argument("--reseed", action="store_true", help="recreate the db")
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--categories", type=int, default=500)
+    parser.add_argument("--tags-per-post", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=5, help="per post")
+    parser.add_argument("--requests", type=int, default=1000, help="per scenario")
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="previous results to compare with")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.reseed:
+        for suffix in ("", "-wal", "-shm", ".search.json"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    # 配置在导入 app 时读取，需先设置环境变量
+    os.environ["DB_URL"] = f"sqlite://{args.db}"
+    os.environ.setdefault("SEARCH_INDEX_PATH", f"{args.db}.search.json")
+    asyncio.run(main(args))
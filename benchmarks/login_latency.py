@@ -0,0 +1,85 @@
+"""
+在并发登录的同时测量 GET /posts/ 的延迟，验证 bcrypt 不再阻塞事件循环。
+
+    python -m benchmarks.login_latency --logins 8 --reads 200
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DB_URL", "sqlite://:memory:")
+
+from app import app  # noqa: E402
+from app.schema import Category, Post, User  # noqa: E402
+from app.utils import auth  # noqa: E402
+
+from ._asgi import percentiles, request  # noqa: E402
+
+PASSWORD = "benchmark1"
+
+
+async def seed(posts: int):
+    user = await User.create(
+        username="bench", password=await auth.hash_password(PASSWORD)
+    )
+    category = await Category.create(name="bench")
+    await Post.bulk_create(
+        [
+            Post(
+                title=f"Post {i}",
+                summary="",
+                content="",
+                author=user,
+                category=category,
+            )
+            for i in range(posts)
+        ]
+    )
+
+
+async def read_latencies(reads: int) -> list[float]:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        status, _, _ = await request(app, "GET", "/posts/")
+        samples.append(time.perf_counter() - start)
+        assert status == 200, status
+    return samples
+
+
+async def login_loop(stop: asyncio.Event, counter: list[int]):
+    while not stop.is_set():
+        params = {"username": "bench", "password": PASSWORD}
+        status, _, _ = await request(app, "POST", "/login", params=params)
+        counter[status == 200] += 1
+
+
+async def main(args):
+    async with app.router.lifespan_context(app):
+        await seed(args.posts)
+
+        idle = percentiles(await read_latencies(args.reads))
+
+        stop = asyncio.Event()
+        counter = [0, 0]
+        logins = [
+            asyncio.create_task(login_loop(stop, counter)) for _ in range(args.logins)
+        ]
+        await asyncio.sleep(0.05)
+        busy = percentiles(await read_latencies(args.reads))
+        stop.set()
+        await asyncio.gather(*logins)
+
+    print(f"GET /posts/ idle        : {idle}")
+    print(f"GET /posts/ with logins : {busy}")
+    print(f"logins ok={counter[1]} rejected/failed={counter[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=8, help="concurrent logins")
+    parser.add_argument("--reads", type=int, default=200, help="GET /posts/ samples")
+    parser.add_argument("--posts", type=int, default=100, help="seeded posts")
+    asyncio.run(main(parser.parse_args()))
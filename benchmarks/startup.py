@@ -0,0 +1,92 @@
+"""
+测量冷启动时间：每次在新进程中导入 app 并执行 lifespan 启动，分别对比开启与关闭
+fast boot（结构哈希一致时跳过建表）的耗时。
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --db benchmark.sqlite3  # 使用已有数据库
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import orjson
+
+# 在子进程中执行，输出各阶段耗时（秒）
+CHILD = """
+import asyncio, sys, time
+start = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+    return started
+
+started = asyncio.run(main())
+sys.stdout.write(
+    "\\n" + '{"import": %f, "startup": %f}' % (imported - start, started - imported)
+)
+"""
+
+
+def run_once(env: dict[str, str]) -> dict[str, float]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = orjson.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def summarize(samples: list[dict[str, float]]) -> dict[str, float]:
+    return {
+        key: statistics.median(sample[key] for sample in samples) * 1000
+        for key in samples[0]
+    }
+
+
+def main(args):
+    tmp = tempfile.mkdtemp(prefix="moblog-startup-")
+    db = args.db or os.path.join(tmp, "startup.sqlite3")
+    env = {
+        **os.environ,
+        "DB_URL": f"sqlite://{db}",
+        "SEARCH_INDEX_PATH": f"{db}.search.json",
+        "RESOURCE_DIR": os.path.join(tmp, "resources"),
+    }
+    # 第一次启动负责建表和写入默认配置
+    run_once(env)
+
+    results = {}
+    for name, fast_boot in (("full", "false"), ("fast", "true")):
+        samples = [run_once({**env, "FAST_BOOT": fast_boot}) for _ in range(args.runs)]
+        results[name] = summary = summarize(samples)
+        print(
+            f"{name:<6} import {summary['import']:>7.1f}ms"
+            f"  startup {summary['startup']:>7.1f}ms"
+            f"  process {summary['process']:>7.1f}ms  (median of {args.runs})"
+        )
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db", help="existing SQLite file to start against")
+    parser.add_argument("--output", help="write JSON results here")
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+文章列表的查询次数与每页数量无关
+"""
+
+import asyncio
+import logging
+
+import pytest
+from tortoise import Tortoise
+
+from app.config import server_config
+from app.schema import Category, Post, Tag, User
+from app.utils.pagination import paginate_posts
+
+
+class QueryCounter(logging.Handler):
+    """
+    通过 Tortoise 的调试日志统计执行的 SQL 数量
+    """
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord):
+        self.count += 1
+
+
+async def seed(posts: int = 60):
+    author = await User.create(username="alice", password="x")
+    categories = [await Category.create(name=f"category-{i}") for i in range(3)]
+    tags = [await Tag.create(name=f"tag-{i}") for i in range(5)]
+    for i in range(posts):
+        post = await Post.create(
+            title=f"post-{i}",
+            summary="summary",
+            content="content",
+            author=author,
+            category=categories[i % len(categories)],
+        )
+        await post.tags.add(*tags[: i % len(tags) + 1])
+    await Post.sync_read_model(await Post.all().values_list("id", flat=True))
+
+
+async def count_queries(per_page_values: tuple[int, ...], **kwargs) -> list[int]:
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.schema"]})
+    await Tortoise.generate_schemas()
+    counter = QueryCounter()
+    logger = logging.getLogger("tortoise.db_client")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(counter)
+    try:
+        await seed()
+        counts = []
+        for per_page in per_page_values:
+            counter.count = 0
+            result = await paginate_posts(Post.all(), per_page=per_page, **kwargs)
+            assert len(result.posts) == per_page
+            counts.append(counter.count)
+        return counts
+    finally:
+        logger.removeHandler(counter)
+        await Tortoise.close_connections()
+
+
+@pytest.mark.parametrize("read_model", [True, False])
+@pytest.mark.parametrize("view", ["full", "summary"])
+@pytest.mark.parametrize("cursor", [False, True])
+def test_query_count_does_not_grow_with_per_page(monkeypatch, read_model, view, cursor):
+    monkeypatch.setattr(server_config, "post_read_model", read_model)
+    small, large = asyncio.run(count_queries((5, 50), view=view, cursor=cursor))
+    assert small == large